@@ -1,7 +1,39 @@
 import os
+import sqlite3
 import sys
 import time
-import sqlite3
+from itertools import groupby
+import basedatos
+
+CONTINENTES = ["Africa","Asia","Europa","N/Centro America y Caribe","Oceania","Sudamerica"]
+
+INSERTAR = "insert into Registro (Continente, Pais, Tecnico) values (?, ?, ?)"
+
+def equipos(continente=None):
+    # el filtro va en la consulta y usa el indice Registro_Continente; las
+    # filas (ID, Continente, Pais, Tecnico) se leen a medida que se recorren
+    with basedatos.conexion(basedatos.BASE_REGISTRO) as conexion:
+        if continente is None:
+            cursor = conexion.execute("select ID, Continente, Pais, Tecnico from Registro"
+                                      " order by Continente, ID")
+        else:
+            cursor = conexion.execute("select ID, Continente, Pais, Tecnico from Registro"
+                                      " where Continente = ? order by ID", (continente,))
+        for fila in cursor:
+            yield fila
+
+def equipos_por_continente():
+    # una sola consulta ordenada por continente, agrupada al recorrerla
+    return [(continente, list(filas))
+            for continente, filas in groupby(equipos(), key=lambda fila: fila[1])]
+
+def mostrar_equipos(filas):
+    for i in filas:
+        print("ID: {}".format(i[0]))
+        print("Pais: {}".format(i[2]))
+        print("Tecnico: {}".format(i[3]))
+        print("------------------")
+
 def informacion():
     archi=open('info.txt','r')
     lineas=archi.readlines()
@@ -11,7 +43,7 @@ def informacion():
 
 def menu_Continentes():
     op = "0"
-    listCont = ["Africa","Asia","Europa","N/Centro America y Caribe","Oceania","Sudamerica"]
+    listCont = CONTINENTES
     while(op == "0"):
         print("\n\tCONTIENENTES")
         print(" 1.- {}\n 2.- {}\n 3.- {}\n 4.- {}\n 5.- {}\n 6.- {}".format(listCont[0],listCont[1],listCont[2],listCont[3],listCont[4],listCont[5]))
@@ -39,103 +71,113 @@ class Registro:
         pais = str(input("Pais: "))
         tecnico = str(input("Tecnico: "))
 
-        conexion = sqlite3.connect("Registro.s3db")
-        cursor = conexion.cursor()
-        cursor.execute("insert into Registro (Continente, Pais, Tecnico) values ('"+continente+"','"+pais+"','"+tecnico+"')")
-        conexion.commit()
-        conexion.close()
+        try:
+            with basedatos.conexion(basedatos.BASE_REGISTRO) as conexion:
+                cursor = conexion.cursor()
+                cursor.execute(INSERTAR, (continente, pais, tecnico))
+        except sqlite3.IntegrityError:
+            print("{} ya esta inscrito!".format(pais))
+            return
         print("Se registro con exito!")
 
+    def importar(self, ruta, tamano_lote=basedatos.TAMANO_LOTE):
+        # columnas del archivo: Continente, Pais, Tecnico; todo el archivo se
+        # inserta en una sola transaccion, o nada si hay un error. Los paises
+        # ya inscritos o repetidos en el archivo se saltan y se reportan
+        continentes = {c.lower(): c for c in CONTINENTES}
+        inscritos = set()
+        rechazadas = []
+        repetidas = []
+
+        def validas():
+            primera = True
+            for linea, fila in basedatos.leer_delimitado(ruta):
+                if primera and fila[0].lower() == "continente":
+                    primera = False
+                    continue
+                primera = False
+                if len(fila) != 3 or fila[0].lower() not in continentes or not fila[1]:
+                    rechazadas.append(str(linea))
+                    continue
+                if fila[1] in inscritos:
+                    repetidas.append("{} ({})".format(linea, fila[1]))
+                    continue
+                inscritos.add(fila[1])
+                yield (continentes[fila[0].lower()], fila[1], fila[2])
+
+        inicio = time.perf_counter()
+        with basedatos.conexion(basedatos.BASE_REGISTRO) as conexion:
+            cursor = conexion.cursor()
+            # nadie mas puede inscribir paises hasta terminar la importacion
+            cursor.execute("BEGIN IMMEDIATE")
+            inscritos.update(pais for (pais,) in cursor.execute("select Pais from Registro"))
+            total = basedatos.insertar_lotes(cursor, INSERTAR, validas(), tamano_lote)
+        segundos = time.perf_counter() - inicio
+        print("Se importaron {} paises en {:.2f} s ({:.0f} filas/s)".format(
+            total, segundos, total / segundos if segundos else 0))
+        basedatos.reportar_lineas("Filas rechazadas", rechazadas)
+        basedatos.reportar_lineas("Paises ya inscritos o repetidos", repetidas)
+        return total
+
     def mostrar_Reg(self):
         os.system("cls")
         cont = menu_Continentes()
-        conexion = sqlite3.connect("Registro.s3db")
-        cursor = conexion.cursor()
-        cursor.execute("SELECT * from Registro")
-        if(cont == "Africa"):
-            for i in cursor:
-                if (i[0] == "Africa"):
-                    print("ID: {}".format(i[0]))
-                    print("Pais: {}".format(i[2]))
-                    print("Tecnico: {}".format(i[3]))
-                    print("---------------")
-        elif(cont == "Asia"):
-            for i in cursor:
-                if (i[0] == "Asia"):
-                    print("ID: {}".format(i[0]))
-                    print("Pais: {}".format(i[1]))
-                    print("Tecnico: {}".format(i[2]))
-                    print("---------------")
-        elif(cont == "Europa"):
-            print("\tEUROPA")
-            for i in cursor:
-                if (i[1] == "Europa"):
-                    print("ID: {}".format(i[0]))
-                    print("Pais: {}".format(i[2]))
-                    print("Tecnico: {}".format(i[3]))
-                    print("------------------")
-        elif(cont == "N/Centro America y Caribe"):
-            print("\tN/CENTRO AMERICA Y CARIBE")
-            for i in cursor:
-                if (i[1] == "N/Centro America y Caribe"):
-                    print("ID: {}".format(i[0]))
-                    print("Pais: {}".format(i[2]))
-                    print("Tecnico: {}".format(i[3]))
-                    print("------------------")
-        elif(cont == "Oceania"):
-            print("\tOCEANIA")
-            for i in cursor:
-                if (i[1] == "Oceania"):
-                    print("ID: {}".format(i[0]))
-                    print("Pais: {}".format(i[2]))
-                    print("Tecnico: {}".format(i[3]))
-                    print("------------------")
-        elif(cont == "Sudamerica"):
-            print("\tSUDAMERICA")
-            for i in cursor:
-                if (i[1] == "Sudamerica"):
-                    print("ID: {}".format(i[0]))
-                    print("Pais: {}".format(i[2]))
-                    print("Tecnico: {}".format(i[3]))
-                    print("------------------")
+        print("\t{}".format(cont.upper()))
+        mostrar_equipos(equipos(cont))
     
     
     def modificar(self):
         self.mostrar_Reg()
         codigo = str(input("Ingrese el Codigo del que desea modificar: "))
+        try:
+            codigo = int(codigo)
+        except ValueError:
+            print("Ingrese solo digitos!")
+            return
         os.system("cls")
         print("Ingresando los nuevos Datos")
         continente = menu_Continentes()
         pais = str(input("Pais: "))
         tecnico = str(input("Tecnico: "))
-        conexion = sqlite3.connect("Registro.s3db")
-        cursor = conexion.cursor()
-        cursor.execute("update Registro set Continente = '"+continente+"', Pais = '"+pais+"', Tecnico = '"+tecnico+"' where ID = '"+codigo+"'")
-        conexion.commit()
-        conexion.close()
+        try:
+            with basedatos.conexion(basedatos.BASE_REGISTRO) as conexion:
+                cursor = conexion.cursor()
+                cursor.execute("update Registro set Continente = ?, Pais = ?, Tecnico = ? where ID = ?",
+                               (continente, pais, tecnico, codigo))
+        except sqlite3.IntegrityError:
+            print("{} ya esta inscrito!".format(pais))
+            return
         os.system("cls")
-        print("Su Modificacion se Realizo con Exito!")
+        if cursor.rowcount == 0:
+            print("No existe una inscripcion con el codigo {}".format(codigo))
+        else:
+            print("Su Modificacion se Realizo con Exito!")
         time.sleep(2)
         
     def eliminar(self):
         self.mostrar_Reg()
-        codigo = str(input("Ingrese el Codigo del que desea modificar: "))
+        codigo = str(input("Ingrese el Codigo del que desea eliminar: "))
+        try:
+            codigo = int(codigo)
+        except ValueError:
+            print("Ingrese solo digitos!")
+            return
         os.system("cls")
-        conexion = sqlite3.connect("Registro.s3db")
-        cursor = conexion.cursor()
-        cursor.execute("SELECT * from Registro")
-        cursor.execute("delete from Registro where ID = '"+codigo+"'")
-        conexion.commit()
-        conexion.close()
-        print("Pais Eliminado!")
+        with basedatos.conexion(basedatos.BASE_REGISTRO) as conexion:
+            cursor = conexion.cursor()
+            cursor.execute("delete from Registro where ID = ?", (codigo,))
+        if cursor.rowcount == 0:
+            print("No existe una inscripcion con el codigo {}".format(codigo))
+        else:
+            print("Pais Eliminado!")
         
 def registro_Menu():
     op = 0
     r = Registro()
-    listMenu = ["Inscripcion","Modificar Inscripcion","Monstrar Paises Inscritos","Eliminar Inscripcion","Atras"]
-    while(op not in [1,2,3,4,5]):
+    listMenu = ["Inscripcion","Modificar Inscripcion","Monstrar Paises Inscritos","Eliminar Inscripcion","Importar Inscripciones","Atras"]
+    while(op not in [1,2,3,4,5,6]):
         print("\n\tREGISTRO")
-        print(" 1.- {}\n 2.- {}\n 3.- {}\n 4.- {}\n 5.- {}\n".format(listMenu[0],listMenu[1],listMenu[2],listMenu[3],listMenu[4]))
+        print(" 1.- {}\n 2.- {}\n 3.- {}\n 4.- {}\n 5.- {}\n 6.- {}\n".format(listMenu[0],listMenu[1],listMenu[2],listMenu[3],listMenu[4],listMenu[5]))
         op = input("Ingrese una opcion: ")
         try:
             op = int(op)
@@ -157,6 +199,12 @@ def registro_Menu():
     elif(op == 4):
         r.eliminar()
     elif(op == 5):
+        ruta = str(input("Archivo CSV o TSV (Continente, Pais, Tecnico): "))
+        try:
+            r.importar(ruta)
+        except (OSError, UnicodeDecodeError) as e:
+            print("No se pudo importar el archivo: {}".format(e))
+    elif(op == 6):
         menu()
         
                   
@@ -176,6 +224,11 @@ def menu():
         informacion()
     elif (op == "2"):
         registro_Menu()
+    elif (op == "3"):
+        os.system("cls")
+        for continente, filas in equipos_por_continente():
+            print("\t{} ({} equipos)".format(continente.upper(), len(filas)))
+            mostrar_equipos(filas)
         
 def salir():
     os.system("cls")
@@ -195,14 +248,14 @@ salir()
 def datosPP(pais1,pais2):
     datosP1 = []
     datosP2 = []
-    conexion = sqlite3.connect("mundial.s3db")
-    cursor = conexion.cursor()
-    cursor.execute("SELECT * from Grupos")
-    for i in cursor:
-        if(i[1] == pais1):
-            for j in i:
-                datosP1.append(j)
-        elif(i[1] == pais2):
-            for j in i:
-                datosP2.append(j)
+    with basedatos.conexion(basedatos.BASE_MUNDIAL) as conexion:
+        cursor = conexion.cursor()
+        cursor.execute("SELECT * from Grupos")
+        for i in cursor:
+            if(i[1] == pais1):
+                for j in i:
+                    datosP1.append(j)
+            elif(i[1] == pais2):
+                for j in i:
+                    datosP2.append(j)
     return (datosP1,datosP2)
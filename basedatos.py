@@ -0,0 +1,227 @@
+import atexit
+import csv
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+BASE_REGISTRO = "Registro.s3db"
+BASE_MUNDIAL = "mundial.s3db"
+
+# conexiones abiertas como maximo por cada archivo de base de datos
+TAMANO_POOL = 4
+
+# segundos que se espera a que otra conexion libere la base de datos
+ESPERA = 10
+
+# sentencias compiladas que recuerda cada conexion; las consultas con
+# parametros "?" tienen siempre el mismo texto y se compilan una sola vez
+TAMANO_CACHE_SENTENCIAS = 256
+
+# filas que se envian juntas en cada executemany al importar archivos
+TAMANO_LOTE = 500
+
+PRAGMAS = ["PRAGMA journal_mode = WAL",
+           "PRAGMA synchronous = NORMAL",
+           "PRAGMA temp_store = MEMORY",
+           "PRAGMA cache_size = -8000",
+           "PRAGMA foreign_keys = ON"]
+
+def avisar_descartados(conexion):
+    descartados = conexion.execute("SELECT count(*) FROM Registro_descartados").fetchone()[0]
+    if descartados:
+        print("Se actualizo Registro: {} inscripciones repetidas o incompletas se "
+              "guardaron en la tabla Registro_descartados".format(descartados))
+
+
+# migraciones del esquema de cada base de datos; la posicion en la lista es
+# la version, que se guarda en PRAGMA user_version. Solo se agregan pasos
+# al final, nunca se cambian los que ya se publicaron. Un paso es una
+# sentencia SQL o una funcion que recibe la conexion
+MIGRACIONES = {
+    BASE_REGISTRO: [
+        # 1: clave primaria ID, un registro por pais e indices de busqueda
+        ["CREATE TABLE IF NOT EXISTS Registro (Continente VARCHAR(30), Pais VARCHAR(20), Tecnico VARCHAR(40))",
+         "CREATE TABLE Registro_nuevo (ID INTEGER PRIMARY KEY, Continente VARCHAR(30) NOT NULL,"
+         " Pais VARCHAR(20) NOT NULL, Tecnico VARCHAR(40))",
+         # si un pais estaba repetido se queda el primero que se inscribio
+         "INSERT INTO Registro_nuevo (Continente, Pais, Tecnico)"
+         " SELECT Continente, Pais, Tecnico FROM Registro"
+         " WHERE rowid IN (SELECT min(rowid) FROM Registro"
+         " WHERE Pais IS NOT NULL AND Continente IS NOT NULL GROUP BY Pais)"
+         " ORDER BY rowid",
+         # las filas que no se copiaron no se pierden
+         "CREATE TABLE Registro_descartados (Continente VARCHAR(30), Pais VARCHAR(20), Tecnico VARCHAR(40))",
+         "INSERT INTO Registro_descartados (Continente, Pais, Tecnico)"
+         " SELECT Continente, Pais, Tecnico FROM Registro"
+         " WHERE rowid NOT IN (SELECT min(rowid) FROM Registro"
+         " WHERE Pais IS NOT NULL AND Continente IS NOT NULL GROUP BY Pais)"
+         " ORDER BY rowid",
+         avisar_descartados,
+         "DROP TABLE Registro",
+         "ALTER TABLE Registro_nuevo RENAME TO Registro",
+         "CREATE UNIQUE INDEX Registro_Pais ON Registro (Pais)",
+         "CREATE INDEX Registro_Continente ON Registro (Continente)"],
+    ],
+}
+
+
+class Pool:
+    def __init__(self, ruta, tamano=TAMANO_POOL):
+        self.ruta = ruta
+        self.tamano = tamano
+        self.creadas = 0
+        self.migrada = False
+        # la ultima conexion devuelta se usa primero, su cache sigue caliente
+        self.libres = queue.LifoQueue()
+        self.candado = threading.Lock()
+
+    def nueva_conexion(self):
+        conexion = sqlite3.connect(self.ruta, timeout=ESPERA, check_same_thread=False,
+                                   cached_statements=TAMANO_CACHE_SENTENCIAS)
+        for pragma in PRAGMAS:
+            conexion.execute(pragma)
+        if not self.migrada:
+            try:
+                migrar(conexion, MIGRACIONES.get(self.ruta, []))
+            except sqlite3.Error:
+                conexion.close()
+                raise
+            self.migrada = True
+        return conexion
+
+    def obtener(self):
+        try:
+            return self.libres.get_nowait()
+        except queue.Empty:
+            pass
+        with self.candado:
+            crear = self.creadas < self.tamano
+            if crear:
+                self.creadas += 1
+        if not crear:
+            # todas las conexiones estan en uso, se espera a que devuelvan una;
+            # si nadie la devuelve (p. ej. el mismo hilo tiene abiertos todos
+            # los bloques conexion()), se avisa en vez de esperar para siempre
+            try:
+                return self.libres.get(timeout=ESPERA)
+            except queue.Empty:
+                raise sqlite3.OperationalError(
+                    "las {} conexiones a {} siguen en uso despues de {} s; "
+                    "hay bloques conexion() o recorridos sin terminar".format(
+                        self.tamano, self.ruta, ESPERA))
+        try:
+            return self.nueva_conexion()
+        except sqlite3.Error:
+            with self.candado:
+                self.creadas -= 1
+            raise
+
+    def devolver(self, conexion):
+        self.libres.put(conexion)
+
+    def cerrar(self):
+        while True:
+            try:
+                conexion = self.libres.get_nowait()
+            except queue.Empty:
+                break
+            conexion.close()
+            with self.candado:
+                self.creadas -= 1
+
+
+def migrar(conexion, migraciones):
+    # aplica las migraciones que faltan, cada una en su propia transaccion;
+    # BEGIN IMMEDIATE bloquea a otros procesos, que ven la version nueva
+    version = conexion.execute("PRAGMA user_version").fetchone()[0]
+    while version < len(migraciones):
+        conexion.execute("BEGIN IMMEDIATE")
+        try:
+            version = conexion.execute("PRAGMA user_version").fetchone()[0]
+            if version < len(migraciones):
+                for paso in migraciones[version]:
+                    if callable(paso):
+                        paso(conexion)
+                    else:
+                        conexion.execute(paso)
+                version += 1
+                conexion.execute("PRAGMA user_version = {:d}".format(version))
+            conexion.commit()
+        except BaseException:
+            conexion.rollback()
+            raise
+
+
+_pools = {}
+_candado = threading.Lock()
+
+
+def pool(ruta):
+    with _candado:
+        if ruta not in _pools:
+            _pools[ruta] = Pool(ruta)
+        return _pools[ruta]
+
+
+@contextmanager
+def conexion(ruta):
+    # presta una conexion del pool: al salir del bloque se confirman los
+    # cambios, o se deshacen si hubo un error, y la conexion se devuelve
+    p = pool(ruta)
+    con = p.obtener()
+    try:
+        yield con
+        con.commit()
+    except BaseException:
+        con.rollback()
+        raise
+    finally:
+        p.devolver(con)
+
+
+def cerrar_todo():
+    with _candado:
+        pools = list(_pools.values())
+    for p in pools:
+        p.cerrar()
+
+
+atexit.register(cerrar_todo)
+
+
+def leer_delimitado(ruta):
+    # recorre un archivo CSV o TSV fila por fila, sin cargarlo entero;
+    # devuelve el numero de linea junto con cada fila para reportar errores
+    delimitador = "\t" if ruta.lower().endswith((".tsv", ".tab", ".txt")) else ","
+    with open(ruta, newline="", encoding="utf-8-sig") as archivo:
+        lector = csv.reader(archivo, delimiter=delimitador)
+        for fila in lector:
+            if any(campo.strip() for campo in fila):
+                yield lector.line_num, [campo.strip() for campo in fila]
+
+
+def en_lotes(filas, tamano=TAMANO_LOTE):
+    # agrupa las filas en listas de `tamano` filas, la ultima puede ser menor
+    lote = []
+    for fila in filas:
+        lote.append(fila)
+        if len(lote) >= tamano:
+            yield lote
+            lote = []
+    if lote:
+        yield lote
+
+
+def insertar_lotes(cursor, sentencia, filas, tamano=TAMANO_LOTE):
+    total = 0
+    for lote in en_lotes(filas, tamano):
+        cursor.executemany(sentencia, lote)
+        total += len(lote)
+    return total
+
+
+def reportar_lineas(titulo, lineas):
+    if lineas:
+        print("{} ({}), lineas: {}{}".format(
+            titulo, len(lineas), ", ".join(lineas[:20]), " ..." if len(lineas) > 20 else ""))
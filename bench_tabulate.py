@@ -0,0 +1,304 @@
+# -*- coding: utf-8 -*-
+"""Benchmarks of the stages of tabulate.
+
+Every stage of `tabulate` (normalization, type inference, formatting,
+alignment, and rendering in every table format) is timed separately on
+synthetic tables, and its peak memory is measured with `tracemalloc`
+(Python 3.4+). Results can be saved as a JSON baseline, and compared
+with a baseline saved earlier."""
+
+from __future__ import print_function
+from __future__ import unicode_literals
+from collections import namedtuple
+import json
+import platform
+import random
+import sys
+import time
+
+import tabulate as T
+
+try:
+    import tracemalloc
+except ImportError:  # Python < 3.4
+    tracemalloc = None
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+_timer = getattr(time, "perf_counter", time.time)
+
+
+PAISES = ["Peru", "Argentina", "Brasil", "Egipto", "Rusia", "Uruguay",
+          "Marruecos", "Portugal", "España", "Francia", "Australia",
+          "Islandia", "Croacia", "Dinamarca", "Nigeria", "Costa Rica"]
+
+Equipo = namedtuple("Equipo", ["pais", "puntos", "promedio", "goles"])
+
+
+def _ints(nrows, rnd):
+    rows = [[rnd.randint(-10**6, 10**6) for _ in range(4)] for _ in range(nrows)]
+    return rows, ["a", "b", "c", "d"]
+
+
+def _floats(nrows, rnd):
+    rows = [[rnd.uniform(-1e6, 1e6) for _ in range(4)] for _ in range(nrows)]
+    return rows, ["a", "b", "c", "d"]
+
+
+def _mixed(nrows, rnd):
+    rows = [[rnd.choice(PAISES), rnd.randint(0, 99),
+             rnd.choice([rnd.random() * 10, None]), "%.2f" % rnd.random()]
+            for _ in range(nrows)]
+    return rows, ["pais", "puntos", "promedio", "goles"]
+
+
+def _ansi(nrows, rnd):
+    rows = [["\x1b[31m%s\x1b[0m" % rnd.choice(PAISES),
+             "\x1b[32m%d\x1b[0m" % rnd.randint(0, 99),
+             rnd.random() * 10, rnd.choice(PAISES)]
+            for _ in range(nrows)]
+    return rows, ["pais", "puntos", "promedio", "rival"]
+
+
+def _dicts(nrows, rnd):
+    rows = [{"pais": rnd.choice(PAISES), "puntos": rnd.randint(0, 99),
+             "promedio": rnd.random() * 10, "goles": rnd.randint(0, 9)}
+            for _ in range(nrows)]
+    return rows, "keys"
+
+
+def _namedtuples(nrows, rnd):
+    rows = [Equipo(rnd.choice(PAISES), rnd.randint(0, 99), rnd.random() * 10,
+                   rnd.randint(0, 9))
+            for _ in range(nrows)]
+    return rows, "keys"
+
+
+def _numpy(nrows, rnd):
+    array = numpy.array([[rnd.uniform(-1e6, 1e6) for _ in range(4)]
+                         for _ in range(nrows)])
+    return array, ["a", "b", "c", "d"]
+
+
+DATASETS = [("ints", _ints), ("floats", _floats), ("mixed", _mixed),
+            ("ansi", _ansi), ("dicts", _dicts), ("namedtuples", _namedtuples)]
+if numpy is not None:
+    DATASETS.append(("numpy", _numpy))
+
+
+def measure(fn, repeat=3, setup=None):
+    """Call `fn` `repeat` times; return its best time, its peak memory
+    (None without tracemalloc), and its last result.
+
+    `setup` is called before every call of `fn`, and is not measured.
+
+    """
+    best = None
+    result = None
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = _timer()
+        result = fn()
+        elapsed = _timer() - start
+        best = elapsed if best is None else min(best, elapsed)
+    peak = None
+    if tracemalloc is not None:
+        if setup is not None:
+            setup()
+        tracemalloc.start()
+        fn()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return best, peak, result
+
+
+def bench_table(data, headers, formats, repeat=3, floatfmt="g", missingval="",
+                numalign="decimal", stralign="left"):
+    """Measure the stages of `tabulate` for one table; return a dict of
+    stage names and (seconds, peak bytes)."""
+    results = {}
+
+    def stage(name, fn, setup=None):
+        seconds, peak, result = measure(fn, repeat, setup)
+        results[name] = (seconds, peak)
+        return result
+
+    cols, colheaders, known = stage(
+        "normalize", lambda: T._normalize_columns(data, headers, floatfmt))
+
+    def infer():
+        return [T._column_type_and_invisible(c) if kt is None else (kt, False)
+                for c, kt in zip(cols, known)]
+    inferred = stage("infer", infer)
+    types = [t for t, _ in inferred]
+
+    def format_columns():
+        return [T._format_cached(c, t, floatfmt, missingval, inv) if kt is None else c
+                for c, kt, (t, inv) in zip(cols, known, inferred)]
+    formatted = stage("format", format_columns, setup=T.clear_format_cache)
+    invisible = T._with_header_invisible([inv for _, inv in inferred], colheaders)
+
+    def align():
+        aligns = [numalign if t in [int, float] else stralign for t in types]
+        decimals = [T._number_decimals(c, t, inv, floatfmt, missingval)
+                    if kt is None and a == "decimal" else None
+                    for c, t, (_, inv), kt, a in zip(formatted, types, inferred, known, aligns)]
+        return T._align_columns(formatted, colheaders, types, numalign, stralign,
+                                invisible, decimals=decimals)
+    aheaders, acols, widths, aligns = stage("align", align)
+
+    for fmt in formats:
+        tablefmt = T._table_formats[fmt]
+        stage("render:" + fmt,
+              lambda: T._format_table(tablefmt, aheaders, zip(*acols), widths, aligns))
+
+    stage("tabulate", lambda: T.tabulate(data, headers), setup=T.clear_format_cache)
+    return results
+
+
+def run(sizes, datasets, formats, repeat=3, log=None):
+    """Benchmark all `datasets` of all `sizes`; return a dict of results
+    by "dataset/rows/stage" keys."""
+    results = {}
+    for nrows in sizes:
+        for name, make in DATASETS:
+            if name not in datasets:
+                continue
+            data, headers = make(nrows, random.Random(0))
+            for stagename, (seconds, peak) in sorted(bench_table(data, headers, formats,
+                                                                 repeat).items()):
+                key = "%s/%d/%s" % (name, nrows, stagename)
+                results[key] = {"seconds": seconds, "peak_bytes": peak}
+                if log is not None:
+                    log(key, seconds, peak)
+    return results
+
+
+def compare(baseline, results, threshold=0.1):
+    """Compare `results` with a `baseline`; return a list of rows (key,
+    old seconds, new seconds, ratio), and a list of keys of stages which
+    are more than `threshold` slower."""
+    rows = []
+    regressions = []
+    for key in sorted(set(baseline) & set(results)):
+        old = baseline[key]["seconds"]
+        new = results[key]["seconds"]
+        ratio = new / old if old else float("inf")
+        rows.append((key, old, new, ratio))
+        if ratio > 1 + threshold:
+            regressions.append(key)
+    return rows, regressions
+
+
+def _main():
+    """\
+    Usage: bench_tabulate.py [options]
+
+    Benchmark the stages of tabulate on synthetic tables.
+
+    Options:
+
+    -h, --help                show this message
+    -n N,..., --rows N,...    numbers of rows of the tables
+                              (default: 1000,100000; try also 1000000)
+    -d D,..., --data D,...    kinds of tables: ints, floats, mixed, ansi, dicts,
+                              namedtuples, numpy (default: all available)
+    -f F,..., --format F,...  table formats to render (default: all)
+    -r N, --repeat N          run every stage N times, report the best time
+                              (default: 3)
+    -o FILE, --output FILE    save results to FILE as a JSON baseline
+    -c FILE, --compare FILE   compare results with a JSON baseline in FILE;
+                              exit with status 1 if a stage got slower
+    -t X, --threshold X       relative slowdown which is a regression
+                              (default: 0.1)
+    """
+    import getopt
+    import textwrap
+    usage = textwrap.dedent(_main.__doc__)
+    try:
+        opts, args = getopt.getopt(sys.argv[1:], "hn:d:f:r:o:c:t:",
+                                   ["help", "rows=", "data=", "format=", "repeat=",
+                                    "output=", "compare=", "threshold="])
+    except getopt.GetoptError as e:
+        print(e)
+        print(usage)
+        sys.exit(2)
+    sizes = [1000, 100000]
+    datasets = [name for name, _ in DATASETS]
+    formats = T.tabulate_formats
+    repeat = 3
+    output = None
+    baseline = None
+    threshold = 0.1
+    try:
+        for opt, value in opts:
+            if opt in ["-n", "--rows"]:
+                sizes = [int(n) for n in value.split(",")]
+            elif opt in ["-d", "--data"]:
+                datasets = value.split(",")
+            elif opt in ["-f", "--format"]:
+                formats = value.split(",")
+            elif opt in ["-r", "--repeat"]:
+                repeat = int(value)
+            elif opt in ["-o", "--output"]:
+                output = value
+            elif opt in ["-c", "--compare"]:
+                baseline = value
+            elif opt in ["-t", "--threshold"]:
+                threshold = float(value)
+            elif opt in ["-h", "--help"]:
+                print(usage)
+                sys.exit(0)
+    except ValueError as e:
+        print(e)
+        print(usage)
+        sys.exit(2)
+    for fmt in formats:
+        if fmt not in T.tabulate_formats:
+            print("%s is not a supported table format" % fmt)
+            print(usage)
+            sys.exit(3)
+    for name in datasets:
+        if name not in [n for n, _ in DATASETS]:
+            if name == "numpy":
+                print("numpy tables need numpy, which is not installed")
+            else:
+                print("%s is not a known kind of table" % name)
+            print(usage)
+            sys.exit(3)
+
+    def log(key, seconds, peak):
+        memory = "" if peak is None else "  %8.1f MiB" % (peak / 2.0**20)
+        print("%-40s %10.4f s%s" % (key, seconds, memory))
+        sys.stdout.flush()
+
+    results = run(sizes, datasets, formats, repeat, log)
+
+    if output:
+        with open(output, "w") as f:
+            json.dump({"python": platform.python_version(),
+                       "tabulate": T.__version__,
+                       "repeat": repeat,
+                       "results": results}, f, indent=2, sort_keys=True)
+    if baseline:
+        with open(baseline) as f:
+            old = json.load(f)["results"]
+        rows, regressions = compare(old, results, threshold)
+        print()
+        print(T.tabulate(rows, ["stage", "baseline, s", "now, s", "ratio"],
+                         floatfmt=".4f"))
+        if regressions:
+            print()
+            print("%d stages are more than %d%% slower:" % (len(regressions),
+                                                           threshold * 100))
+            for key in regressions:
+                print("  " + key)
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    _main()
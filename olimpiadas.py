@@ -1,12 +1,31 @@
+import os
+import time
+import basedatos
+
+base1 = "base1.s3db"
+base2 = "base2.s3db"
+
+INSERTAR_REGISTRO = "insert into Registro2 (Deporte, Area, Escuela, Participante, CUI) values (?, ?, ?, ?, ?)"
+
+# cada deporte tiene su tabla en base2; los nombres de tabla no pueden ser
+# parametros, por eso cada deporte tiene su sentencia fija
+INSERTAR_DEPORTE = {
+    "Futbol": "insert into futbol (Area, Escuela, Participante, CUI) values (?, ?, ?, ?)",
+    "Vóley": "insert into vóley (Area, Escuela, Participante, CUI) values (?, ?, ?, ?)",
+    "Básquet": "insert into basquet (Area, Escuela, Participante, CUI) values (?, ?, ?, ?)",
+    "Atletismo": "insert into atletismo (Area, Escuela, Participante, CUI) values (?, ?, ?, ?)",
+    "Natación": "insert into natacion (Area, Escuela, Participante, CUI) values (?, ?, ?, ?)",
+}
+
 class Registro:
     def __init__(self):
-        self.lista_depor = ["Futbol"," Vóley"," Básquet"," Atletismo"," Natación "]
+        self.lista_depor = ["Futbol","Vóley","Básquet","Atletismo","Natación"]
 
     def inscripcion(self):
         Deporte = menu_deport()
         os.system("cls")
         print("\n Ingrese los siguentes Datos\nDeporte: {}".format(Deporte))
-        Deporte = Deporte.title()
+        Deporte = Deporte.strip().title()
         Area = str(input("Areas: "))
         Area = Area.title()
         Escuela = str(input("Escuela profesional: "))
@@ -16,30 +35,52 @@ class Registro:
         CUI = str(input("CUI:"))
         CUI = CUI.title()
 
-        conexion1 = sqlite3.connect(base1)
-        cursor1 = conexion1.cursor()
-        cursor1.execute("insert into Registro2 (Deporte,Area, Escuela, Participante, CUI) values ('"+Deporte+"','"+Area+"','"+Escuela+"','"+Participante+"','"+CUI+"')")
+        with basedatos.conexion(base1) as conexion1, basedatos.conexion(base2) as conexion2:
+            cursor1 = conexion1.cursor()
+            cursor1.execute(INSERTAR_REGISTRO, (Deporte, Area, Escuela, Participante, CUI))
 
-        conexion2 = sqlite3.connect(base2)
-        cursor2 = conexion2.cursor()
-        if (Deporte == self.lista_depor[0]):
-            cursor2.execute("insert into futbol (Area,Escuela,Participante,CUI) values ('"+Area+"','"+Escuela+"','"+Participante+"','"+CUI+"')")
-        elif (Deporte == self.lista_depor[1]):
-            cursor2.execute("insert into vóley (Area,Escuela,Participante,CUI) values ('"+Area+"','"+Escuela+"','"+Participante+"','"+CUI+"')")
-        elif (Deporte == self.lista_depor[2]):
-            cursor2.execute("insert into basquet (Area,Escuela,Participante,CUI) values ('"+Area+"','"+Escuela+"','"+Participante+"','"+CUI+"')")
-        elif (Deporte == self.lista_depor[3]):
-            cursor2.execute("insert into atletismo (Area,Escuela,Participante,CUI) values ('"+Area+"','"+Escuela+"','"+Participante+"','"+CUI+"')")
-        elif (Deporte == self.lista_depor[4]):
-            cursor2.execute("insert into natacion (Area,Escuela,Participante,CUI) values ('"+Area+"','"+Escuela+"','"+Participante+"','"+CUI+"')")
+            cursor2 = conexion2.cursor()
+            sentencia = INSERTAR_DEPORTE.get(Deporte)
+            if sentencia is not None:
+                cursor2.execute(sentencia, (Area, Escuela, Participante, CUI))
 
+            #cursor2.execute("insert into {} (Escuela,Puntaje,Partidos_Ganados,Partidos_Empatados, Partidos_Perdidos) values ('"+Escuela+"','0','0','0','0')".format(continente))
+        print("Se registro con exito!")
 
-        #cursor2.execute("insert into {} (Escuela,Puntaje,Partidos_Ganados,Partidos_Empatados, Partidos_Perdidos) values ('"+Escuela+"','0','0','0','0')".format(continente))
+    def importar(self, ruta, tamano_lote=basedatos.TAMANO_LOTE):
+        # columnas del archivo: Deporte, Area, Escuela, Participante, CUI
+        rechazadas = []
 
-        conexion1.commit()
-        conexion2.commit()
+        def validas():
+            primera = True
+            for linea, fila in basedatos.leer_delimitado(ruta):
+                if primera and fila[0].lower() == "deporte":
+                    primera = False
+                    continue
+                primera = False
+                if len(fila) != 5 or fila[0].title() not in self.lista_depor:
+                    rechazadas.append(str(linea))
+                    continue
+                yield [campo.title() for campo in fila]
 
-        conexion1.close()
-        conexion2.close()
-        print("Se registro con exito!")
+        total = 0
+        inicio = time.perf_counter()
+        with basedatos.conexion(base1) as conexion1, basedatos.conexion(base2) as conexion2:
+            cursor1 = conexion1.cursor()
+            cursor2 = conexion2.cursor()
+            for lote in basedatos.en_lotes(validas(), tamano_lote):
+                self.insertar_lote(cursor1, cursor2, lote)
+                total += len(lote)
+        segundos = time.perf_counter() - inicio
+        print("Se importaron {} participantes en {:.2f} s ({:.0f} filas/s)".format(
+            total, segundos, total / segundos if segundos else 0))
+        basedatos.reportar_lineas("Filas rechazadas", rechazadas)
+        return total
 
+    def insertar_lote(self, cursor1, cursor2, lote):
+        cursor1.executemany(INSERTAR_REGISTRO, lote)
+        por_deporte = {}
+        for fila in lote:
+            por_deporte.setdefault(fila[0], []).append(fila[1:])
+        for deporte, filas in por_deporte.items():
+            cursor2.executemany(INSERTAR_DEPORTE[deporte], filas)
@@ -4,13 +4,21 @@
 
 from __future__ import print_function
 from __future__ import unicode_literals
-from collections import namedtuple
+from collections import namedtuple, Counter, OrderedDict
+from contextlib import contextmanager
+from itertools import chain, islice
 from platform import python_version_tuple
+import csv
+import random
 import re
+import sys
+import time
+import warnings
 
 
 if python_version_tuple()[0] < "3":
     from itertools import izip_longest
+    from itertools import izip as zip
     from functools import partial
     _none_type = type(None)
     _int_type = int
@@ -24,7 +32,7 @@ if python_version_tuple()[0] < "3":
 
 else:
     from itertools import zip_longest as izip_longest
-    from functools import reduce, partial
+    from functools import partial
     _none_type = type(None)
     _int_type = int
     _long_type = int
@@ -37,13 +45,24 @@ else:
         return isinstance(f, io.IOBase)
 
 
-__all__ = ["tabulate", "tabulate_formats", "simple_separated_format"]
+__all__ = ["tabulate", "tabulate_lines", "tabulate_to", "tabulate_formats",
+           "simple_separated_format", "table_template", "TableSchema",
+           "PagedTable", "LiveTable", "format_cache_info", "clear_format_cache",
+           "profiling", "StageProfile", "write_delimited"]
 __version__ = "0.7.5"
 
 
 MIN_PADDING = 2
 
 
+# tables with fewer rows are never processed in parallel
+PARALLEL_MIN_ROWS = 10000
+
+
+# the number of formatted values and visible widths to remember
+FORMAT_CACHE_SIZE = 4096
+
+
 Line = namedtuple("Line", ["begin", "hline", "sep", "end"])
 
 
@@ -107,25 +126,33 @@ def _pipe_line_with_colons(colwidths, colaligns):
     segments = [_pipe_segment_with_colons(a, w) for a, w in zip(colaligns, colwidths)]
     return "|" + "|".join(segments) + "|"
 
+
+_mediawiki_alignment = { "left":    '',
+                         "right":   'align="right"| ',
+                         "center":  'align="center"| ',
+                         "decimal": 'align="right"| ' }
+
+
 def _mediawiki_row_with_attrs(separator, cell_values, colwidths, colaligns):
-    alignment = { "left":    '',
-                  "right":   'align="right"| ',
-                  "center":  'align="center"| ',
-                  "decimal": 'align="right"| ' }
     # hard-coded padding _around_ align attribute and value together
     # rather than padding parameter which affects only the value
-    values_with_attrs = [' ' + alignment.get(a, '') + c + ' '
+    values_with_attrs = [' ' + _mediawiki_alignment.get(a, '') + c + ' '
                          for c, a in zip(cell_values, colaligns)]
     colsep = separator*2
     return (separator + colsep.join(values_with_attrs)).rstrip()
 
 
+_html_alignment = { "left":    '',
+                    "right":   ' style="text-align: right;"',
+                    "center":  ' style="text-align: center;"',
+                    "decimal": ' style="text-align: right;"' }
+
+HTML_ESCAPE_RULES = {"&": "&amp;", "<": "&lt;", ">": "&gt;", '"': "&quot;"}
+
+
 def _html_row_with_attrs(celltag, cell_values, colwidths, colaligns):
-    alignment = { "left":    '',
-                  "right":   ' style="text-align: right;"',
-                  "center":  ' style="text-align: center;"',
-                  "decimal": ' style="text-align: right;"' }
-    values_with_attrs = ["<{0}{1}>{2}</{0}>".format(celltag, alignment.get(a, ''), c)
+    values_with_attrs = ["<{0}{1}>{2}</{0}>".format(celltag, _html_alignment.get(a, ''),
+                                                    c.translate(_html_escape_table))
                          for c, a in zip(cell_values, colaligns)]
     return "<tr>" + "".join(values_with_attrs).rstrip() + "</tr>"
 
@@ -142,10 +169,13 @@ LATEX_ESCAPE_RULES = {r"&": r"\&", r"%": r"\%", r"$": r"\$", r"#": r"\#",
                       r"<": r"\ensuremath{<}", r">": r"\ensuremath{>}"}
 
 
+# translation tables for str.translate, which escapes a string at once
+_html_escape_table = dict((ord(c), e) for c, e in HTML_ESCAPE_RULES.items())
+_latex_escape_table = dict((ord(c), e) for c, e in LATEX_ESCAPE_RULES.items())
+
+
 def _latex_row(cell_values, colwidths, colaligns):
-    def escape_char(c):
-        return LATEX_ESCAPE_RULES.get(c, c)
-    escaped_values = ["".join(map(escape_char, cell)) for cell in cell_values]
+    escaped_values = [cell.translate(_latex_escape_table) for cell in cell_values]
     rowfmt = DataRow("", "&", "\\\\")
     return _build_simple_row(escaped_values, rowfmt)
 
@@ -276,6 +306,143 @@ def simple_separated_format(separator):
                        padding=0, with_header_hide=None)
 
 
+# A known shape of a table (see `tabulate`):
+#
+#   - headers, as in `tabulate`,
+#   - coltypes, a list of column types (int, float, str, or None),
+#   - colwidths, a list of column widths (int or None).
+#
+TableSchema = namedtuple("TableSchema", ["headers", "coltypes", "colwidths"])
+TableSchema.__new__.__defaults__ = ((), None, None)
+
+
+CacheInfo = namedtuple("CacheInfo", ["hits", "misses", "maxsize", "currsize"])
+
+
+class _LRUCache(object):
+    """A bounded mapping which discards the least recently used items.
+
+    >>> c = _LRUCache(2)
+    >>> c.put("a", 1); c.put("b", 2); c.get("a"); c.put("c", 3)
+    1
+    >>> c.get("b") is None, c.info()
+    (True, CacheInfo(hits=1, misses=1, maxsize=2, currsize=2))
+
+    """
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+
+    def get(self, key):
+        "Return a cached value (None if missing), and mark it as recently used."
+        try:
+            value = self._data.pop(key)
+        except KeyError:
+            self.misses += 1
+            return None
+        self._data[key] = value
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        if len(self._data) >= self.maxsize:
+            self._data.popitem(last=False)
+        self._data[key] = value
+
+    def clear(self):
+        self._data.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def info(self):
+        return CacheInfo(self.hits, self.misses, self.maxsize, len(self._data))
+
+
+_format_cache = _LRUCache(FORMAT_CACHE_SIZE)
+_width_cache = _LRUCache(FORMAT_CACHE_SIZE)
+
+
+def format_cache_info():
+    """Statistics of the caches of formatted values and of their visible widths.
+
+    Return a dict with two CacheInfo tuples, "format" and "width".
+
+    """
+    return {"format": _format_cache.info(), "width": _width_cache.info()}
+
+
+def clear_format_cache():
+    "Clear the caches of formatted values and visible widths, reset statistics."
+    _format_cache.clear()
+    _width_cache.clear()
+
+
+# A measurement of a stage of a `tabulate` call: the name of the stage,
+# its wall time in seconds, numbers of rows and columns, and the net
+# number of memory blocks allocated by the stage (None if unknown).
+StageProfile = namedtuple("StageProfile", ["stage", "seconds", "rows", "cols",
+                                           "allocated"])
+
+
+_profilers = []
+_timer = getattr(time, "perf_counter", time.time)
+_allocated_blocks = getattr(sys, "getallocatedblocks", lambda: None)
+
+
+@contextmanager
+def profiling(callback):
+    """Call `callback` with a `StageProfile` of every stage of every
+    `tabulate` call in the block (in any thread).
+
+    >>> names = []
+    >>> with profiling(lambda stage: names.append(stage.stage)):
+    ...     _ = tabulate([["spam", 1]])
+    >>> print(" ".join(names))
+    normalize infer format align headers render
+
+    """
+    _profilers.append(callback)
+    try:
+        yield callback
+    finally:
+        _profilers.remove(callback)
+
+
+class _StageTimer(object):
+    "Measure stages of a `tabulate` call, and report them to callbacks."
+
+    def __init__(self, callbacks):
+        self.callbacks = callbacks
+
+    def start(self, stage):
+        self.stage = stage
+        self.blocks = _allocated_blocks()
+        self.started = _timer()
+
+    def stop(self, rows, cols):
+        seconds = _timer() - self.started
+        blocks = _allocated_blocks()
+        allocated = None if blocks is None else blocks - self.blocks
+        profile = StageProfile(self.stage, seconds, rows, cols, allocated)
+        for callback in self.callbacks:
+            callback(profile)
+
+
+class _NoStageTimer(object):
+    "A `_StageTimer` which doesn't measure anything."
+
+    def start(self, stage):
+        pass
+
+    def stop(self, rows, cols):
+        pass
+
+
+_no_stage_timer = _NoStageTimer()
+
+
 def _isconvertible(conv, string):
     try:
         n = conv(string)
@@ -372,6 +539,49 @@ def _afterpoint(string):
         return -1  # not a number
 
 
+# Float formats which produce numbers `_afterpoint` can parse, e.g. ".2f",
+# but not ",.2f" or "%".
+_plain_floatfmt_re = re.compile(r"^[+\- ]?#?0?\d*(\.\d+)?[eEfFgG]?$")
+
+
+def _number_decimals(strings, coltype, has_invisible, floatfmt, missingval):
+    """Symbols after the decimal point (see `_afterpoint`) of values of a
+    column which were formatted as numbers of an inferred `coltype`; None
+    if they cannot be found without parsing the values.
+
+    Formatted integers have no decimal point, formatted floats have it
+    (if any) at the last "." or exponent, and other strings are missing
+    values. Numbers are not parsed again.
+
+    >>> _number_decimals(["1.5", "n/a", "1e+10", "3"], float, False, "g", "n/a")
+    [1, -1, 3, -1]
+    >>> _number_decimals(["1,234.50"], float, False, ",.2f", "") is None
+    True
+
+    """
+    if coltype is int:
+        missing = _afterpoint(missingval)
+        if missing == -1:
+            return [-1] * len(strings)
+        return [missing if s == missingval else -1 for s in strings]
+    elif coltype is not float or not _plain_floatfmt_re.match(floatfmt):
+        return None
+    missing = _afterpoint(missingval)
+    decimals = []
+    append = decimals.append
+    for s in strings:
+        if s == missingval:
+            append(missing)
+            continue
+        if has_invisible and "\x1b" in s:
+            s = _strip_invisible(s)
+        pos = s.rfind(".")
+        if pos < 0:
+            pos = max(s.rfind("e"), s.rfind("E"))
+        append(len(s) - pos - 1 if pos >= 0 else -1)
+    return decimals
+
+
 def _padleft(width, s, has_invisible=True):
     """Flush right.
 
@@ -379,7 +589,7 @@ def _padleft(width, s, has_invisible=True):
     True
 
     """
-    iwidth = width + len(s) - len(_strip_invisible(s)) if has_invisible else width
+    iwidth = width + len(s) - _visible_width(s) if has_invisible else width
     fmt = "{0:>%ds}" % iwidth
     return fmt.format(s)
 
@@ -391,7 +601,7 @@ def _padright(width, s, has_invisible=True):
     True
 
     """
-    iwidth = width + len(s) - len(_strip_invisible(s)) if has_invisible else width
+    iwidth = width + len(s) - _visible_width(s) if has_invisible else width
     fmt = "{0:<%ds}" % iwidth
     return fmt.format(s)
 
@@ -403,7 +613,7 @@ def _padboth(width, s, has_invisible=True):
     True
 
     """
-    iwidth = width + len(s) - len(_strip_invisible(s)) if has_invisible else width
+    iwidth = width + len(s) - _visible_width(s) if has_invisible else width
     fmt = "{0:^%ds}" % iwidth
     return fmt.format(s)
 
@@ -424,14 +634,24 @@ def _visible_width(s):
 
     """
     if isinstance(s, _text_type) or isinstance(s, _binary_type):
-        return len(_strip_invisible(s))
+        width = _width_cache.get(s)
+        if width is None:
+            width = len(_strip_invisible(s))
+            _width_cache.put(s, width)
+        return width
     else:
         return len(_text_type(s))
 
 
-def _align_column(strings, alignment, minwidth=0, has_invisible=True):
+def _align_column(strings, alignment, minwidth=0, has_invisible=True, width=None,
+                  decimals=None):
     """[string] -> [padded_string]
 
+    If `width` is given, strings are padded to max(`width`, `minwidth`)
+    without measuring them; longer strings are left as they are. For
+    "decimal" alignment, the symbols after the decimal point of every
+    string may be given as `decimals` (see `_number_decimals`).
+
     >>> list(map(str,_align_column(["12.345", "-1234.5", "1.23", "1234.5", "1e+234", "1.0e234"], "decimal")))
     ['   12.345  ', '-1234.5    ', '    1.23   ', ' 1234.5    ', '    1e+234 ', '    1.0e234']
 
@@ -446,35 +666,95 @@ def _align_column(strings, alignment, minwidth=0, has_invisible=True):
         strings = [s.strip() for s in strings]
         padfn = _padboth
     elif alignment == "decimal":
-        if has_invisible:
-            decimals = [_afterpoint(_strip_invisible(s)) for s in strings]
-        else:
-            decimals = [_afterpoint(s) for s in strings]
+        if decimals is None:
+            if has_invisible:
+                decimals = [_afterpoint(_strip_invisible(s)) for s in strings]
+            else:
+                decimals = [_afterpoint(s) for s in strings]
+        # pad on both sides in one pass
         maxdecimals = max(decimals)
-        strings = [s + (maxdecimals - decs) * " "
-                   for s, decs in zip(strings, decimals)]
-        padfn = _padleft
+        rpads = [maxdecimals - decs for decs in decimals]
+        widths = list(map(_width_fn(has_invisible), strings))
+        if width is not None:
+            maxwidth = max(width, minwidth)
+        else:
+            maxwidth = max(max(w + r for w, r in zip(widths, rpads)), minwidth)
+        return [" " * (maxwidth - w - r) + s + " " * r
+                for s, w, r in zip(strings, widths, rpads)]
     elif not alignment:
         return strings
     else:
         strings = [s.strip() for s in strings]
         padfn = _padright
 
-    if has_invisible:
-        width_fn = _visible_width
+    if width is not None:
+        maxwidth = max(width, minwidth)
+    elif has_invisible:
+        maxwidth = max(max(map(_visible_width, strings)), minwidth)
     else:
-        width_fn = len
-
-    maxwidth = max(max(map(width_fn, strings)), minwidth)
+        maxwidth = max(max(map(len, strings)), minwidth)
     padded_strings = [padfn(maxwidth, s, has_invisible) for s in strings]
     return padded_strings
 
 
-def _more_generic(type1, type2):
-    types = { _none_type: 0, int: 1, float: 2, _binary_type: 3, _text_type: 4 }
-    invtypes = { 4: _text_type, 3: _binary_type, 2: float, 1: int, 0: _none_type }
-    moregeneric = max(types.get(type1, 4), types.get(type2, 4))
-    return invtypes[moregeneric]
+def _column_layout(strings, alignment, minwidth=0, has_invisible=True,
+                   decimals=None):
+    """Width and the maximal number of decimals of a column aligned with
+    `_align_column`, without padding the strings.
+
+    >>> _column_layout(["12.345", "-1234.5", "1.23"], "decimal")
+    (9, 3)
+    >>> _column_layout(["spam", " eggs "], "left", 6)
+    (6, -1)
+
+    """
+    width_fn = _width_fn(has_invisible)
+    if alignment == "decimal":
+        if decimals is None:
+            if has_invisible:
+                decimals = [_afterpoint(_strip_invisible(s)) for s in strings]
+            else:
+                decimals = [_afterpoint(s) for s in strings]
+        maxdecimals = max(decimals)
+        maxwidth = max(width_fn(s) - decs for s, decs in zip(strings, decimals))
+        return max(maxwidth + maxdecimals, minwidth), maxdecimals
+    elif not alignment:
+        # not padded, the width is that of the first cell (see _align_headers)
+        return max(width_fn(strings[0]), minwidth), -1
+    else:
+        return max(max(width_fn(s.strip()) for s in strings), minwidth), -1
+
+
+# Most numeric strings match one of these patterns, and can be classified
+# without raising and catching conversion exceptions.
+_int_re = re.compile(r"^\s*[+-]?\d+\s*$")
+_float_re = re.compile(r"^\s*[+-]?(\d+\.?\d*|\.\d+)([eE][+-]?\d+)?\s*$")
+# A string with any other character (a letter other than those in "nan",
+# "inf", "infinity" or an exponent) cannot be converted to a number.
+_maybe_number_re = re.compile(r"^[\s\d+\-._eEiInNfFtTyYaA]*$")
+
+
+_type_ranks = { _none_type: 0, int: 1, float: 2, _binary_type: 3, _text_type: 4 }
+_rank_types = { 0: _none_type, 1: int, 2: float, 3: _binary_type, 4: _text_type }
+
+
+def _text_type_rank(string, has_invisible=True):
+    """Rank of the least generic type of a text string (see _type_ranks).
+
+    >>> [_text_type_rank(s) for s in ["42", " -1.5e3 ", "inf", "1_000", "Peru"]]
+    [1, 2, 2, 1, 4]
+
+    """
+    if has_invisible and "\x1b" in string:
+        string = _strip_invisible(string)
+    if _int_re.match(string):
+        return 1
+    elif _float_re.match(string):
+        return 2
+    elif not _maybe_number_re.match(string):
+        return 4
+    else:  # rare cases, like "nan" or "1_000"
+        return _type_ranks.get(_type(string, False), 4)
 
 
 def _column_type(strings, has_invisible=True):
@@ -497,8 +777,77 @@ def _column_type(strings, has_invisible=True):
     True
 
     """
-    types = [_type(s, has_invisible) for s in strings ]
-    return reduce(_more_generic, types, int)
+    return _column_type_and_invisible(strings, has_invisible)[0]
+
+
+def _column_type_and_invisible(strings, has_invisible=True):
+    """The least generic column type, and if ANSI control codes were found.
+
+    Control codes are looked for in strings while their types are
+    inferred (once per distinct string).
+
+    >>> _column_type_and_invisible(["1", "\x1b[31m2\x1b[0m"]) == (int, True)
+    True
+    >>> _column_type_and_invisible(["a", 1, "\x1b[31mb\x1b[0m"]) == (_text_type, True)
+    True
+
+    """
+    # single pass; text values are classified once per distinct value,
+    # and types are not inferred once the column is known to be text
+    rank = 1  # int
+    invisible = False
+    text_ranks = {}
+    values = iter(strings)
+    for s in values:
+        valtype = type(s)
+        if valtype is int or s is None:
+            continue
+        elif valtype is float:
+            r = 2
+        elif valtype is _text_type:
+            r = text_ranks.get(s)
+            if r is None:
+                r = text_ranks[s] = _text_type_rank(s, has_invisible)
+                if not invisible and "\x1b" in s:
+                    invisible = bool(_invisible_codes.search(s))
+        else:
+            if not invisible and valtype is _binary_type:
+                invisible = bool(_invisible_codes_bytes.search(s))
+            r = _type_ranks.get(_type(s, has_invisible), 4)
+        if r > rank:
+            rank = r
+            if rank == 4:
+                break
+    if not invisible:
+        # look for control codes in the rest of a text column
+        invisible = _column_invisible(values)
+    return _rank_types[rank], invisible
+
+
+def _column_invisible(values):
+    "True if any of text or binary values contains ANSI control codes."
+    return any(_invisible_codes.search(s) if type(s) is _text_type and "\x1b" in s
+               else type(s) is _binary_type and _invisible_codes_bytes.search(s)
+               for s in values)
+
+
+def _value_rank(val):
+    """Rank of the least generic type of a single value; the type of a
+    column is that of the highest rank (see `_column_type_and_invisible`).
+
+    >>> [_value_rank(v) for v in [None, 42, "4.2", "\x1b[31m42\x1b[0m", "Peru"]]
+    [1, 1, 2, 1, 4]
+
+    """
+    valtype = type(val)
+    if valtype is int or val is None:
+        return 1
+    elif valtype is float:
+        return 2
+    elif valtype is _text_type:
+        return _text_type_rank(val)
+    else:
+        return _type_ranks.get(_type(val), 4)
 
 
 def _format(val, valtype, floatfmt, missingval="", has_invisible=True):
@@ -540,12 +889,50 @@ def _align_header(header, alignment, width):
         return _padright(width, header)
     elif alignment == "center":
         return _padboth(width, header)
-   elif not alignment:
+    elif not alignment:
         return "{0}".format(header)
     else:
         return _padleft(width, header)
 
 
+def _normalize_dict_rows(rows, headers):
+    """Transform a list of dicts to a list of lists.
+
+    Return the rows, the headers and the list of keys (in input order)
+    which correspond to the columns.
+
+    """
+    uniq_keys = set() # implements hashed lookup
+    keys = [] # storage for set
+    if headers == "firstrow":
+        firstdict = rows[0] if len(rows) > 0 else {}
+        keys.extend(firstdict.keys())
+        uniq_keys.update(keys)
+        rows = rows[1:]
+    for row in rows:
+        for k in row.keys():
+            #Save unique items in input order
+            if k not in uniq_keys:
+                keys.append(k)
+                uniq_keys.add(k)
+    if headers == 'keys':
+        headers = keys
+    elif isinstance(headers, dict):
+        # a dict of headers for a list of dicts
+        headers = [headers.get(k, k) for k in keys]
+        headers = list(map(_text_type, headers))
+    elif headers == "firstrow":
+        if len(rows) > 0:
+            headers = [firstdict.get(k, k) for k in keys]
+            headers = list(map(_text_type, headers))
+        else:
+            headers = []
+    elif headers:
+        raise ValueError('headers for a list of dicts is not a dict or a keyword')
+    rows = [[row.get(k) for k in keys] for row in rows]
+    return rows, headers, keys
+
+
 def _normalize_tabular_data(tabular_data, headers):
     """Transform a supported data type to a list of lists, and a list of headers.
 
@@ -607,34 +994,7 @@ def _normalize_tabular_data(tabular_data, headers):
         elif (len(rows) > 0
               and isinstance(rows[0], dict)):
             # dict or OrderedDict
-            uniq_keys = set() # implements hashed lookup
-            keys = [] # storage for set
-            if headers == "firstrow":
-                firstdict = rows[0] if len(rows) > 0 else {}
-                keys.extend(firstdict.keys())
-                uniq_keys.update(keys)
-                rows = rows[1:]
-            for row in rows:
-                for k in row.keys():
-                    #Save unique items in input order
-                    if k not in uniq_keys:
-                        keys.append(k)
-                        uniq_keys.add(k)
-            if headers == 'keys':
-                headers = keys
-            elif isinstance(headers, dict):
-                # a dict of headers for a list of dicts
-                headers = [headers.get(k, k) for k in keys]
-                headers = list(map(_text_type, headers))
-            elif headers == "firstrow":
-                if len(rows) > 0:
-                    headers = [firstdict.get(k, k) for k in keys]
-                    headers = list(map(_text_type, headers))
-                else:
-                    headers = []
-            elif headers:
-                raise ValueError('headers for a list of dicts is not a dict or a keyword')
-            rows = [[row.get(k) for k in keys] for row in rows]
+            rows, headers, _ = _normalize_dict_rows(rows, headers)
         elif headers == "keys" and len(rows) > 0:
             # keys are column indices
             headers = list(map(_text_type, range(len(rows[0]))))
@@ -645,7 +1005,7 @@ def _normalize_tabular_data(tabular_data, headers):
         rows = rows[1:]
 
     headers = list(map(_text_type,headers))
-    rows = list(map(list,rows))
+    rows = [row if isinstance(row, (list, tuple)) else list(row) for row in rows]
 
     # pad with empty headers for initial columns if necessary
     if headers and len(rows) > 0:
@@ -659,7 +1019,8 @@ def _normalize_tabular_data(tabular_data, headers):
 
 def tabulate(tabular_data, headers=(), tablefmt="simple",
              floatfmt="g", numalign="decimal", stralign="left",
-             missingval=""):
+             missingval="", executor=None, coltypes=None, colwidths=None,
+             schema=None, profile=None):
     """Format a fixed width table for pretty printing.
 
     >>> print(tabulate([[1, 2.34], [-56, "8.999"], ["2", "10001"]]))
@@ -867,6 +1228,13 @@ def tabulate(tabular_data, headers=(), tablefmt="simple",
     <tr><td>eggs     </td><td style="text-align: right;"> 451     </td></tr>
     </table>
 
+    Special characters of HTML are replaced with entities:
+
+    >>> print(tabulate([["<b>", "R&D"]], tablefmt="html"))
+    <table>
+    <tr><td>&lt;b&gt;</td><td>R&amp;D</td></tr>
+    </table>
+
     "latex" produces a tabular environment of LaTeX document markup:
 
     >>> print(tabulate([["spam", 41.9999], ["eggs", "451.0"]], tablefmt="latex"))
@@ -887,49 +1255,1328 @@ def tabulate(tabular_data, headers=(), tablefmt="simple",
      eggs & 451      \\\\
     \\bottomrule
     \end{tabular}
+
+
+    Known column types and widths
+    -----------------------------
+
+    If the types of columns are known in advance, pass them as `coltypes`
+    (a list of `int`, `float`, `str` or None to infer the type); cells
+    which don't match the given type are shown as text. Likewise, known
+    `colwidths` (None to measure the column) are used without measuring
+    the cells; a column is never narrower than its header, and longer
+    cells widen their rows. A `TableSchema` bundles headers, column types
+    and widths, and can be reused for every table of the same shape:
+
+    >>> schema = TableSchema(["Pais", "Puntos"], [str, int], [9, 6])
+    >>> print(tabulate([["Peru", 3], ["Argentina", 10]], schema=schema))
+    Pais         Puntos
+    ---------  --------
+    Peru              3
+    Argentina        10
+
+
+    Parallel formatting
+    -------------------
+
+    Columns are formatted and aligned independently of each other. To
+    process them in parallel, pass an `executor` with a `map` method, e.g.
+    `concurrent.futures.ProcessPoolExecutor()`, `ThreadPoolExecutor()` or
+    `multiprocessing.Pool()`. It is used only for tables with at least
+    `PARALLEL_MIN_ROWS` rows and more than one column; the output is the
+    same as without it.
+
+    Profiling
+    ---------
+
+    If `profile` is a function, it's called after every stage of the
+    call with a `StageProfile`: its wall time, numbers of rows and
+    columns, and the net number of allocated memory blocks. The stages
+    are "normalize", "infer" (types of columns and ANSI control codes
+    are found in a single pass), "format", "align", "headers" and
+    "render"; with an `executor`, "format", "align" and "headers" are
+    a single "parallel" stage. See also `profiling`.
+
+    >>> stages = []
+    >>> _ = tabulate([["spam", 1], ["eggs", 42]], profile=stages.append)
+    >>> print(", ".join("%s %dx%d" % (s.stage, s.rows, s.cols) for s in stages))
+    normalize 2x2, infer 2x2, format 2x2, align 2x2, headers 2x2, render 2x2
     """
     if tabular_data is None:
         tabular_data = []
-    list_of_lists, headers = _normalize_tabular_data(tabular_data, headers)
+    if schema is not None:
+        headers = headers or schema.headers
+        coltypes = schema.coltypes if coltypes is None else coltypes
+        colwidths = schema.colwidths if colwidths is None else colwidths
+    callbacks = _profilers + ([profile] if profile is not None else [])
+    stages = _StageTimer(callbacks) if callbacks else _no_stage_timer
+
+    stages.start("normalize")
+    cols, headers, known_types = _normalize_columns(tabular_data, headers, floatfmt)
+    nrows, ncols = (len(cols[0]) if cols else 0), len(cols)
+    stages.stop(nrows, ncols)
+
+    typehints = _type_hints(coltypes, len(cols))
+    colwidths = list(colwidths or []) + [None] * (len(cols) - len(colwidths or []))
+    coltypes = known_types
+
+    if (executor is not None and len(cols) > 1
+        and len(cols[0]) >= PARALLEL_MIN_ROWS):
+        stages.start("parallel")
+        headers, cols, minwidths, aligns = _parallel_columns(executor, cols, headers,
+                                                             coltypes, floatfmt,
+                                                             missingval, numalign,
+                                                             stralign, typehints,
+                                                             colwidths)
+        stages.stop(nrows, ncols)
+    else:
+        stages.start("infer")
+        inferred = _infer_columns(cols, coltypes, typehints)
+        stages.stop(nrows, ncols)
+        stages.start("format")
+        cols, coltypes, invisible, decimals = _format_inferred_columns(cols, headers,
+                                                                       inferred, floatfmt,
+                                                                       missingval, numalign)
+        stages.stop(nrows, ncols)
+        stages.start("align")
+        cols, minwidths, aligns = _align_data_columns(cols, headers, coltypes,
+                                                      numalign, stralign, invisible,
+                                                      colwidths, decimals)
+        stages.stop(nrows, ncols)
+        stages.start("headers")
+        headers, minwidths = _align_headers(headers, cols, aligns, minwidths,
+                                            stralign, invisible, colwidths)
+        stages.stop(nrows, ncols)
+    rows = zip(*cols)  # rows are assembled only when they are rendered
+
+    if not isinstance(tablefmt, TableFormat):
+        tablefmt = _table_formats.get(tablefmt, _table_formats["simple"])
+
+    stages.start("render")
+    table = _format_table(tablefmt, headers, rows, minwidths, aligns)
+    stages.stop(nrows, ncols)
+    return table
+
+
+def tabulate_lines(tabular_data, headers=(), tablefmt="simple",
+                   floatfmt="g", numalign="decimal", stralign="left",
+                   missingval="", lookahead=1000, sample=0, overflow="widen"):
+    """Generate the lines of a table one at a time.
+
+    Accepts the same arguments as `tabulate`, but `tabular_data` may be
+    any iterator of rows, e.g. a `sqlite3` cursor (with `headers="keys"`
+    the column names are taken from `cursor.description`).
 
-    # optimization: look for ANSI control codes once,
-    # enable smart width functions only if a control code is found
-    plain_text = '\n'.join(['\t'.join(map(_text_type, headers))] + \
-                            ['\t'.join(map(_text_type, row)) for row in list_of_lists])
-    has_invisible = re.search(_invisible_codes, plain_text)
-    if has_invisible:
-        width_fn = _visible_width
+    Only the first `lookahead` rows are kept in memory; column types and
+    widths are computed from them, and the remaining rows are formatted
+    and rendered as they are read. With `lookahead=None` the whole input
+    is read first, and the output is the same as that of `tabulate`.
+
+    If `tabular_data` is a sequence (e.g. a list), the estimate may also
+    use `sample` more rows, drawn at random (but reproducibly) from the
+    rows after the first `lookahead` ones.
+
+    A cell which is wider than its estimated column width is handled
+    according to `overflow`:
+
+      - "widen": the cell widens its own row (the default),
+      - "truncate": the cell is cut to the column width, and its last
+        visible character is replaced with an ellipsis.
+
+    In both cases a warning with the number of such cells is issued when
+    the table is complete.
+
+    The columns of an iterator of dicts are the keys of the first
+    `lookahead` rows. Values of keys which appear only in later rows are
+    dropped, and a warning with their number is issued likewise.
+
+    >>> rows = iter([["spam", 41.9999], ["eggs", "451.0"]])
+    >>> for line in tabulate_lines(rows, ["strings", "numbers"]):
+    ...     print(line)
+    strings      numbers
+    ---------  ---------
+    spam         41.9999
+    eggs        451
+
+    >>> rows = iter([["spam", 1], ["eggs", 42], ["bacon", 3.5]])
+    >>> import warnings; warnings.simplefilter("ignore")
+    >>> print("\\n".join(tabulate_lines(rows, tablefmt="plain", lookahead=2)))
+    spam   1
+    eggs  42
+    bacon  3.5
+    >>> rows = iter([["spam", 1], ["eggs", 42], ["bacon", 3.5]])
+    >>> print("\\n".join(tabulate_lines(rows, tablefmt="plain", lookahead=2,
+    ...                                 overflow="truncate")))
+    spam   1
+    eggs  42
+    bac\u2026  3\u2026
+    >>> warnings.resetwarnings()
+
+    A dict of columns is sampled by rows too:
+
+    >>> columns = {"n": [1, 2, 3, 1000], "s": ["a", "b", "c", "d"]}
+    >>> print("\\n".join(tabulate_lines(columns, "keys", lookahead=1, sample=3)))
+       n  s
+    ----  ---
+       1  a
+       2  b
+       3  c
+    1000  d
+
+    >>> tabulate_lines([[1]], overflow="wrap")  # doctest: +ELLIPSIS
+    Traceback (most recent call last):
+      ...
+    ValueError: overflow must be "widen" or "truncate", not ...'wrap'
+
+    """
+    if overflow not in ("widen", "truncate"):
+        raise ValueError('overflow must be "widen" or "truncate", not %r' % (overflow,))
+    return _tabulate_lines(tabular_data, headers, tablefmt, floatfmt, numalign,
+                           stralign, missingval, lookahead, sample, overflow)
+
+
+def _tabulate_lines(tabular_data, headers, tablefmt, floatfmt, numalign,
+                    stralign, missingval, lookahead, sample, overflow):
+    "Generate the lines of a table; see `tabulate_lines`."
+    unseen = Counter()
+    if (_is_numpy_array(tabular_data) or _is_dataframe(tabular_data)
+            or _has_typed_columns(tabular_data)):
+        # the data are already in memory
+        cols, headers, coltypes = _normalize_columns(tabular_data, headers, floatfmt)
+        tail, sampled = iter([]), []
     else:
-        width_fn = len
-   
-    # format rows and columns, convert numeric values to strings
+        head, headers, tail, sampled = _iter_tabular_data(tabular_data, headers,
+                                                          lookahead, sample, unseen)
+        cols, coltypes = list(zip(*(head + sampled))), None
+
+    cols, coltypes, invisible, decimals = _format_columns(cols, headers, floatfmt,
+                                                          missingval, coltypes,
+                                                          numalign=numalign)
+    if numalign == "decimal":
+        decimals = [(d if d is not None
+                     else [_afterpoint(_strip_invisible(s) if inv else s) for s in c])
+                    if ct in [int, float] else None
+                    for c, ct, inv, d in zip(cols, coltypes, invisible, decimals)]
+        maxdecimals = [max([-1] + d) if d is not None else -1 for d in decimals]
+    else:
+        maxdecimals = [-1] * len(cols)
+    headers, cols, colwidths, aligns = _align_columns(cols, headers, coltypes,
+                                                      numalign, stralign,
+                                                      invisible, decimals=decimals)
+
+    ncols = len(cols)
+    overflows = [0]
+    tail_rows = (_stream_row(row, ncols, coltypes, aligns, colwidths, maxdecimals,
+                             floatfmt, missingval, overflow, overflows)
+                 for row in tail)
+    rows = zip(*cols)
+    if sampled:
+        rows = islice(rows, len(cols[0]) - len(sampled))  # rendered in place later
+    rows = chain(rows, tail_rows)
+
+    if not isinstance(tablefmt, TableFormat):
+        tablefmt = _table_formats.get(tablefmt, _table_formats["simple"])
+
+    for line in _iter_table_lines(tablefmt, headers, rows, colwidths, aligns):
+        yield line
+
+    if overflows[0]:
+        action = "truncated" if overflow == "truncate" else "widened their rows"
+        warnings.warn("%d cells were wider than the estimated column widths and %s"
+                      % (overflows[0], action), stacklevel=2)
+    if unseen:
+        warnings.warn(_unseen_keys_message(unseen), stacklevel=2)
+
+
+def tabulate_to(file, tabular_data, headers=(), tablefmt="simple",
+                floatfmt="g", numalign="decimal", stralign="left",
+                missingval="", lookahead=1000, sample=0, overflow="widen",
+                bufsize=65536):
+    """Write a table to a file-like object, followed by a newline.
+
+    Accepts the same arguments as `tabulate_lines`. Lines are written as
+    soon as they are rendered, in batches of about `bufsize` characters
+    (one `file.writelines` call per batch), so the complete table is
+    never held in memory.
+
+    >>> import sys
+    >>> tabulate_to(sys.stdout, [["spam", 41.9999], ["eggs", "451.0"]], tablefmt="plain")
+    spam   41.9999
+    eggs  451
+
+    An empty table is written as a single newline, like `print(tabulate(...))`:
+
+    >>> tabulate_to(sys.stdout, [], tablefmt="plain")
+    <BLANKLINE>
+
+    """
+    batch = []
+    size = 0
+    empty = True
+    for line in tabulate_lines(tabular_data, headers, tablefmt, floatfmt,
+                               numalign, stralign, missingval, lookahead,
+                               sample, overflow):
+        empty = False
+        batch.append(line)
+        batch.append("\n")
+        size += len(line) + 1
+        if size >= bufsize:
+            file.writelines(batch)
+            batch = []
+            size = 0
+    if empty:
+        batch.append("\n")
+    if batch:
+        file.writelines(batch)
+
+
+def write_delimited(file, tabular_data, headers=(), delimiter="\t",
+                    floatfmt="g", missingval=""):
+    """Write a table to a file-like object as delimited text, like TSV or CSV.
+
+    Accepts the same data as `tabulate_lines` (for a list of dicts, the
+    columns are the keys of the first row; values of other keys are
+    dropped with a warning, see `tabulate_lines`). Columns are not
+    aligned and their types are not inferred: every row is written with
+    the `csv` module as soon as it's read. Floats are formatted with
+    `floatfmt`, None is written as `missingval`, bytes are decoded like
+    in `tabulate`, and values which contain the delimiter or quotes are
+    quoted.
+
+    >>> import sys
+    >>> write_delimited(sys.stdout, [["spam", 41.9999], ["eggs, ham", None]],
+    ...                 ["name", "qty"], ",", floatfmt=".2f", missingval="n/a")
+    name,qty
+    spam,42.00
+    "eggs, ham",n/a
+    >>> write_delimited(sys.stdout, [[b"abc", "d"]], delimiter=",")
+    abc,d
+
+    """
+    unseen = Counter()
+    head, headers, tail, _ = _iter_tabular_data(tabular_data, headers, lookahead=1,
+                                                unseen=unseen)
+    writer = csv.writer(file, delimiter=delimiter, lineterminator="\n")
+    if headers:
+        writer.writerow(headers)
+    writer.writerows([format(v, floatfmt) if isinstance(v, float)
+                      else missingval if v is None
+                      else _format(v, _binary_type, floatfmt) if isinstance(v, _binary_type)
+                      else v
+                      for v in row]
+                     for row in chain(head, tail))
+    if unseen:
+        warnings.warn(_unseen_keys_message(unseen), stacklevel=2)
+
+
+class PagedTable(object):
+    """A table which is rendered one page at a time.
+
+    Accepts the same arguments as `tabulate`, and the number of rows per
+    page. Column types and widths are computed once for the whole table,
+    so all pages have the same layout, but the aligned cells are not
+    kept. Only the rows of a requested page are formatted, and rendered
+    pages are cached.
+
+    >>> pages = PagedTable([["spam", 1], ["eggs", 42], ["bacon", 3.5]],
+    ...                    ["name", "qty"], pagesize=2)
+    >>> len(pages)
+    2
+    >>> print(pages.page(1))
+    name      qty
+    ------  -----
+    bacon     3.5
+
+    A page is the same as the corresponding rows of the whole table:
+
+    >>> print(tabulate([["spam", 1], ["eggs", 42], ["bacon", 3.5]], ["name", "qty"]))
+    name      qty
+    ------  -----
+    spam      1
+    eggs     42
+    bacon     3.5
+
+    """
+
+    def __init__(self, tabular_data, headers=(), tablefmt="simple",
+                 floatfmt="g", numalign="decimal", stralign="left",
+                 missingval="", pagesize=20):
+        if pagesize < 1:
+            raise ValueError("pagesize must be positive, not %r" % (pagesize,))
+        if tabular_data is None:
+            tabular_data = []
+        rows, headers = _normalize_tabular_data(tabular_data, headers)
+        if not isinstance(tablefmt, TableFormat):
+            tablefmt = _table_formats.get(tablefmt, _table_formats["simple"])
+        self.pagesize = pagesize
+        self._rows = rows
+        self._tablefmt = tablefmt
+        self._floatfmt = floatfmt
+        self._missingval = missingval
+        self._pages = {}
+        self._layout(headers, numalign, stralign)
+
+    def _layout(self, headers, numalign, stralign):
+        "Compute types, alignments, widths and decimals of all columns."
+        header_invisible = _with_header_invisible([], headers)
+        minwidths = ([_width_fn(inv)(h) + MIN_PADDING
+                      for h, inv in zip(headers, header_invisible)]
+                     if headers else [])
+        coltypes, aligns, widths, maxdecimals, invisible = [], [], [], [], []
+        for i, column in enumerate(zip(*self._rows)):
+            formatted, coltype, has_invisible = _format_column(
+                column, None, self._floatfmt, self._missingval)
+            has_invisible = has_invisible or (i < len(headers) and header_invisible[i])
+            alignment = numalign if coltype in [int, float] else stralign
+            minwidth = minwidths[i] if i < len(minwidths) else 0
+            decimals = (_number_decimals(formatted, coltype, has_invisible,
+                                         self._floatfmt, self._missingval)
+                        if alignment == "decimal" else None)
+            width, decimals = _column_layout(formatted, alignment, minwidth,
+                                             has_invisible, decimals)
+            coltypes.append(coltype)
+            aligns.append(alignment)
+            widths.append(width)
+            maxdecimals.append(decimals)
+            invisible.append(has_invisible)
+        if headers:
+            minwidths += [0] * (len(widths) - len(minwidths))
+        else:
+            minwidths = widths
+        invisible = _with_header_invisible(invisible, headers)
+        self._headers, self._colwidths = _align_headers(
+            headers, [[]] * len(widths), aligns, minwidths, stralign,
+            invisible, widths)
+        self._coltypes = coltypes
+        self._aligns = aligns
+        self._maxdecimals = maxdecimals
+
+    def __len__(self):
+        "Number of pages; a table without rows has one page of headers."
+        return max(1, -(-len(self._rows) // self.pagesize))
+
+    def __iter__(self):
+        for n in range(len(self)):
+            yield self.page(n)
+
+    def page(self, n):
+        "Render the headers and the rows of page `n` (counting from 0)."
+        npages = len(self)
+        if n < 0:
+            n += npages
+        if not 0 <= n < npages:
+            raise IndexError("page index out of range")
+        text = self._pages.get(n)
+        if text is None:
+            start = n * self.pagesize
+            ncols = len(self._coltypes)
+            rows = [_stream_row(row, ncols, self._coltypes, self._aligns,
+                                self._colwidths, self._maxdecimals,
+                                self._floatfmt, self._missingval)
+                    for row in self._rows[start:start + self.pagesize]]
+            text = self._pages[n] = _format_table(self._tablefmt, self._headers,
+                                                  rows, self._colwidths,
+                                                  self._aligns)
+        return text
+
+
+class LiveTable(object):
+    """A table which can be changed after it was rendered.
+
+    Accepts the same arguments as `tabulate`. Rows can be appended,
+    updated and removed, and `str(table)` is the same as `tabulate` of
+    the current rows. Types and widths of columns are tracked with
+    counters of the cell types and widths, so after a change only the
+    changed row is formatted and rendered again, unless the type, the
+    width or the decimal point position of a column changed.
+
+    >>> t = LiveTable([["Peru", 3], ["Egipto", 1]], ["Pais", "Pts"])
+    >>> t.append(["Brasil", 10])
+    >>> t.update(1, 1, 4.5)
+    >>> print(t)
+    Pais      Pts
+    ------  -----
+    Peru      3
+    Egipto    4.5
+    Brasil   10
+    >>> t.remove(1)
+    >>> print(t)
+    Pais      Pts
+    ------  -----
+    Peru        3
+    Brasil     10
+
+    Rows are padded with missing values or cut to the number of columns
+    of the table.
+
+    """
+
+    def __init__(self, tabular_data=(), headers=(), tablefmt="simple",
+                 floatfmt="g", numalign="decimal", stralign="left",
+                 missingval=""):
+        if tabular_data is None:
+            tabular_data = []
+        rows, headers = _normalize_tabular_data(tabular_data, headers)
+        if not isinstance(tablefmt, TableFormat):
+            tablefmt = _table_formats.get(tablefmt, _table_formats["simple"])
+        self._tablefmt = tablefmt
+        self._floatfmt = floatfmt
+        self._numalign = numalign
+        self._stralign = stralign
+        self._missingval = missingval
+        self._headers = headers
+        self._ncols = min(map(len, rows)) if rows else len(headers)
+        self._rows = [list(row[:self._ncols]) for row in rows]
+        self._relayout()
+
+    def __len__(self):
+        return len(self._rows)
+
+    def __getitem__(self, i):
+        return list(self._rows[i])
+
+    def __str__(self):
+        return self.render()
+
+    def append(self, row):
+        "Add a row to the end of the table."
+        row = list(row)
+        if not self._rows and not self._headers and len(row) != self._ncols:
+            # the first row of a table without headers defines its columns
+            self._ncols = len(row)
+            self._rows.append(row)
+            self._relayout()
+            return
+        row = (row + [None] * self._ncols)[:self._ncols]
+        i = len(self._rows)
+        self._rows.append(row)
+        self._cells.append([None] * self._ncols)
+        self._lines.append(None)
+        for j, val in enumerate(row):
+            self._ranks[j][_value_rank(val)] += 1
+        for j in range(self._ncols):
+            if not self._retype(j):
+                self._add_cell(i, j)
+        self._update_layout()
+
+    def update(self, i, j, value):
+        "Replace the value in row `i` and column `j`."
+        self._discard_cell(i, j)
+        self._rows[i][j] = value
+        self._ranks[j][_value_rank(value)] += 1
+        if not self._retype(j):
+            self._add_cell(i, j)
+        self._lines[i] = None
+        self._update_layout()
+
+    def remove(self, i):
+        "Remove row `i`."
+        for j in range(self._ncols):
+            self._discard_cell(i, j)
+        del self._rows[i]
+        del self._cells[i]
+        del self._lines[i]
+        for j in range(self._ncols):
+            self._retype(j)
+        self._update_layout()
+
+    def render(self):
+        "Render the table; only rows changed since the last call are rendered."
+        datarow = self._template.datarow
+        lines = self._lines
+        for i, line in enumerate(lines):
+            if line is None:
+                lines[i] = datarow([_pad_cell(s, a, w, md) for s, a, w, md
+                                    in zip(self._cells[i], self._aligns,
+                                           self._colwidths, self._maxdecimals)])
+        return "\n".join(_iter_template_lines(self._template, self._aligned_headers,
+                                              lines))
+
+    def _relayout(self):
+        "Infer types, format all cells and compute the layout from scratch."
+        ncols = self._ncols
+        if self._headers and len(self._headers) < ncols:
+            self._headers = [""] * (ncols - len(self._headers)) + self._headers
+        self._minwidths = ([_visible_width(h) + MIN_PADDING for h in self._headers]
+                           if self._headers else [0] * ncols)
+        self._ranks = [Counter() for _ in range(ncols)]
+        for row in self._rows:
+            for j, val in enumerate(row):
+                self._ranks[j][_value_rank(val)] += 1
+        self._cells = [[None] * ncols for _ in self._rows]
+        self._coltypes = [None] * ncols
+        self._aligns = [None] * ncols
+        self._widths = [None] * ncols
+        self._decimals = [None] * ncols
+        for j in range(ncols):
+            self._retype(j)
+        self._layout = None
+        self._update_layout()
+
+    def _column_type(self, j):
+        ranks = [r for r, count in self._ranks[j].items() if count]
+        return _rank_types[max(ranks + [1])]
+
+    def _retype(self, j):
+        """Format column `j` again if its type changed; return True if it did."""
+        coltype = self._column_type(j)
+        if coltype is self._coltypes[j]:
+            return False
+        self._coltypes[j] = coltype
+        self._aligns[j] = self._numalign if coltype in [int, float] else self._stralign
+        self._widths[j] = Counter()
+        self._decimals[j] = Counter()
+        for i in range(len(self._rows)):
+            self._add_cell(i, j)
+        self._layout = None  # all rows have to be rendered again
+        return True
+
+    def _add_cell(self, i, j):
+        "Format a cell and count its width."
+        val = self._rows[i][j]
+        colored = isinstance(val, _text_type) and "\x1b" in val
+        s = self._cells[i][j] = _format(val, self._coltypes[j], self._floatfmt,
+                                        self._missingval, colored)
+        width, decimals = self._measure(s, j)
+        self._widths[j][width] += 1
+        self._decimals[j][decimals] += 1
+
+    def _discard_cell(self, i, j):
+        "Don't count the type and the width of a cell any more."
+        _uncount(self._ranks[j], _value_rank(self._rows[i][j]))
+        width, decimals = self._measure(self._cells[i][j], j)
+        _uncount(self._widths[j], width)
+        _uncount(self._decimals[j], decimals)
+
+    def _measure(self, s, j):
+        "Width of a cell of column `j` (before the decimal point) and its decimals."
+        if self._aligns[j] == "decimal":
+            decimals = _number_decimals([s], self._coltypes[j], True,
+                                        self._floatfmt, self._missingval)
+            decimals = decimals[0] if decimals else _afterpoint(_strip_invisible(s))
+            return _visible_width(s) - decimals, decimals
+        else:
+            return _visible_width(s.strip()), -1
+
+    def _update_layout(self):
+        "Compute column widths; render all rows again if they changed."
+        widths, maxdecimals = [], []
+        for j, (alignment, minwidth) in enumerate(zip(self._aligns, self._minwidths)):
+            if not self._rows:
+                width, decimals = minwidth, -1
+            elif alignment == "decimal":
+                decimals = max(self._decimals[j])
+                width = max(max(self._widths[j]) + decimals, minwidth)
+            elif not alignment:
+                # not padded, the width is that of the first cell (see _align_headers)
+                width, decimals = max(_visible_width(self._cells[0][j]), minwidth), -1
+            else:
+                width, decimals = max(max(self._widths[j]), minwidth), -1
+            widths.append(width)
+            maxdecimals.append(decimals)
+        if not self._rows and not self._headers:
+            widths = maxdecimals = []  # like `tabulate`, a table without columns
+        layout = (widths, maxdecimals, list(self._aligns), len(self._rows) > 0)
+        if layout == self._layout:
+            return
+        self._layout = layout
+        self._colwidths = widths
+        self._maxdecimals = maxdecimals
+        if self._rows:
+            aligns = self._aligns
+            headers = [_align_header(h, a, w)
+                       for h, a, w in zip(self._headers, aligns, widths)]
+        else:
+            # like `tabulate`, align headers of an empty table as text
+            aligns = []
+            headers = [_align_header(h, self._stralign, w)
+                       for h, w in zip(self._headers, widths)]
+        self._aligned_headers = headers
+        self._template = table_template(self._tablefmt, widths, aligns)
+        self._lines = [None] * len(self._rows)
+
+
+def _uncount(counter, key):
+    "Decrement a count, and forget keys which are not counted any more."
+    counter[key] -= 1
+    if counter[key] <= 0:
+        del counter[key]
+
+
+def _iter_tabular_data(tabular_data, headers, lookahead, sample=0, unseen=None):
+    """Read the first `lookahead` rows of a supported data type.
+
+    Return the first rows normalized to a list of lists, a list of
+    headers, an iterator over the remaining (not yet read) rows, and
+    a list of up to `sample` normalized rows drawn from the remaining
+    rows (only if `tabular_data` is a sequence).
+
+    Columns of dict rows are the keys of the rows which were read; values
+    of other keys in the remaining rows are dropped, and counted by key
+    in the `unseen` Counter (see `_dict_rows`).
+
+    """
+    if tabular_data is None:
+        tabular_data = []
+
+    if headers == "firstrow" and lookahead:
+        lookahead += 1
+
+    if (hasattr(tabular_data, "keys") and hasattr(tabular_data, "values")
+        and hasattr(tabular_data.values, "__call__")):
+        # dict of iterables, columns are transposed lazily
+        if headers == "keys":
+            headers = list(map(_text_type, tabular_data.keys()))
+        columns = list(tabular_data.values())
+        rows = izip_longest(*columns)
+        if all(_is_sequence(c) for c in columns):
+            # rows are sampled from the transposed columns
+            nrows = max([len(c) for c in columns] or [0])
+            row_at = lambda i: tuple(c[i] if i < len(c) else None for c in columns)
+        else:
+            nrows, row_at = 0, None
+    else:
+        if (headers == "keys" and
+            getattr(tabular_data, "description", None)):
+            # DB-API cursor
+            headers = [_text_type(d[0]) for d in tabular_data.description]
+        rows = iter(tabular_data)
+        if _is_sequence(tabular_data):
+            nrows, row_at = len(tabular_data), tabular_data.__getitem__
+        else:
+            nrows, row_at = 0, None
+
+    head = list(islice(rows, lookahead)) if lookahead else list(rows)
+    sampled = []
+    if sample and lookahead and row_at is not None and nrows > len(head):
+        rng = random.Random(0)  # the same sample for the same data
+        nrest = nrows - len(head)
+        indices = rng.sample(range(len(head), nrows), min(sample, nrest))
+        sampled = [row_at(i) for i in sorted(indices)]
+
+    if len(head) > 0 and isinstance(head[0], dict):
+        head, headers, keys = _normalize_dict_rows(head + sampled, headers)
+        tail = _dict_rows(rows, keys, unseen)
+    else:
+        head, headers = _normalize_tabular_data(head + sampled, headers)
+        tail = rows
+    nhead = len(head) - len(sampled)
+    return head[:nhead], headers, tail, head[nhead:]
+
+
+def _is_sequence(data):
+    "Can rows of `data` be read by index, without iterating over it?"
+    return (hasattr(data, "__getitem__") and hasattr(data, "__len__")
+            and not hasattr(data, "keys"))
+
+
+def _dict_rows(rows, keys, unseen=None):
+    """Values of `keys` of dict rows, as lists.
+
+    >>> unseen = Counter()
+    >>> list(_dict_rows(iter([{"a": 1}, {"a": 2, "b": 3}]), ["a"], unseen))
+    [[1], [2]]
+    >>> unseen["b"]
+    1
+
+    """
+    keyset = set(keys)
+    for row in rows:
+        if unseen is not None and not keyset.issuperset(row):
+            unseen.update(k for k in row if k not in keyset)
+        yield [row.get(k) for k in keys]
+
+
+def _unseen_keys_message(unseen):
+    "A warning about values of `unseen` keys which were dropped."
+    return ("%d values were dropped, their keys are not in the first rows: %s"
+            % (sum(unseen.values()), ", ".join(map(_text_type, unseen))))
+
+
+def _normalize_columns(tabular_data, headers, floatfmt="g"):
+    """Transform a supported data type to a list of columns, and a list of headers.
+
+    Return also a list of column types. A column with a known type (not
+    None) is already formatted; the types of other columns are yet to be
+    inferred from their values.
+
+    """
+    if _is_numpy_array(tabular_data):
+        return _numpy_columns(tabular_data, headers, floatfmt)
+    if _is_dataframe(tabular_data):
+        return _dataframe_columns(tabular_data, headers, floatfmt)
+    if (hasattr(tabular_data, "keys") and hasattr(tabular_data, "values")
+        and hasattr(tabular_data.values, "__call__")):
+        return _dict_columns(tabular_data, headers, floatfmt)
+    list_of_lists, headers = _normalize_tabular_data(tabular_data, headers)
     cols = list(zip(*list_of_lists))
-    coltypes = list(map(_column_type, cols))
-    cols = [[_format(v, ct, floatfmt, missingval, has_invisible) for v in c]
-             for c,ct in zip(cols, coltypes)]
+    return cols, headers, [None] * len(cols)
+
+
+def _is_numpy_array(tabular_data):
+    "A non-empty 2D NumPy array or a NumPy record array?"
+    dtype = getattr(tabular_data, "dtype", None)
+    ndim = getattr(tabular_data, "ndim", 0)
+    if dtype is None or len(tabular_data) == 0:
+        return False
+    return ndim == 2 and not dtype.names or ndim == 1 and bool(dtype.names)
+
+
+def _is_dataframe(tabular_data):
+    "A pandas.DataFrame?"
+    return (hasattr(tabular_data, "dtypes") and hasattr(tabular_data, "iloc")
+            and hasattr(tabular_data, "index") and hasattr(tabular_data, "columns"))
+
+
+def _numpy_columns(array, headers, floatfmt):
+    """Split a 2D NumPy array or a record array into columns.
+
+    Integer and floating point columns are formatted directly from their
+    dtype, without looking at their values.
+
+    """
+    if array.dtype.names:
+        names = array.dtype.names
+        columns = [array[name] for name in names]
+        if headers == "keys":
+            headers = names
+    else:
+        columns = [array[:, i] for i in range(array.shape[1])]
+
+    # Python values, converted in bulk
+    kinds = [column.dtype.kind for column in columns]
+    columns = [column.tolist() for column in columns]
+    return _typed_columns(columns, kinds, headers, floatfmt)
+
+
+def _dataframe_columns(df, headers, floatfmt):
+    """Split a pandas.DataFrame into columns, the index being the first one.
+
+    Every column is converted and formatted according to `df.dtypes`;
+    the values of the frame are never copied into a single object matrix.
+
+    """
+    if headers == "keys":
+        headers = list(df.columns)
+    kinds = [df.index.dtype.kind] + [dtype.kind for dtype in df.dtypes]
+    columns = [df.index.tolist()] + [df.iloc[:, i].tolist()
+                                     for i in range(len(df.columns))]
+    return _typed_columns(columns, kinds, headers, floatfmt)
+
+
+def _has_typed_columns(tabular_data):
+    """A dict with typed array columns (see `_column_kind`)?
+
+    Such columns are in memory already, and are formatted according to
+    their types, like in `tabulate`, rather than transposed row by row.
+
+    """
+    return (hasattr(tabular_data, "keys") and hasattr(tabular_data, "values")
+            and hasattr(tabular_data.values, "__call__")
+            and any(_column_kind(c) != "O" for c in tabular_data.values()))
+
+
+def _dict_columns(tabular_data, headers, floatfmt):
+    """Use values of a dict of iterables as columns, without transposing them.
+
+    Lists are used as they are, unless they are shorter than other
+    columns. NumPy arrays, `array.array` and `memoryview` columns are
+    formatted according to the type of their items.
+
+    >>> import array
+    >>> print(tabulate({"a": array.array("i"), "b": []}, "keys"))
+    a    b
+    ---  ---
+
+    """
+    keys = list(tabular_data.keys())
+    columns = []
+    kinds = []
+    for values in tabular_data.values():
+        kinds.append(_column_kind(values))
+        if isinstance(values, list):
+            columns.append(values)
+        elif hasattr(values, "tolist"):
+            columns.append(values.tolist())
+        else:
+            columns.append(list(values))
+
+    # columns have to be of the same length, pad them like izip_longest
+    nrows = max(map(len, columns)) if columns else 0
+    for i, c in enumerate(columns):
+        if len(c) < nrows:
+            columns[i] = c + [None] * (nrows - len(c))
+            kinds[i] = "O"
+
+    if headers == "keys":
+        headers = list(map(_text_type, keys))
+    return _typed_columns(columns, kinds, headers, floatfmt)
+
+
+# array.array typecodes and struct format characters of numeric items
+_buffer_kinds = dict([(code, "i") for code in "bBhHiIlLqQnN"] +
+                     [(code, "f") for code in "efd"])
+
+
+def _column_kind(values):
+    """A NumPy dtype kind of a typed one-dimensional array, or "O".
+
+    >>> import array
+    >>> _column_kind(array.array("d", [1.5])), _column_kind(memoryview(b"ab")), _column_kind([1])
+    ('f', 'i', 'O')
+
+    """
+    dtype = getattr(values, "dtype", None)
+    if dtype is not None:
+        return dtype.kind
+    if getattr(values, "ndim", 1) != 1:
+        return "O"
+    code = getattr(values, "typecode", None) or getattr(values, "format", None)
+    if isinstance(code, _text_type):
+        return _buffer_kinds.get(code.lstrip("@=<>!"), "O")
+    return "O"
+
+
+def _typed_columns(columns, kinds, headers, floatfmt):
+    """Format columns of Python values which come from typed arrays.
+
+    `kinds` are NumPy dtype kinds of the columns; integer and floating
+    point columns are formatted in bulk, other columns are left as they
+    are, and their types are to be inferred later.
+
+    >>> cols, headers, coltypes = _typed_columns([[1, 20], [0.5, 2.0], ["a", "b"]],
+    ...                                          "ifO", "keys", "g")
+    >>> cols == [['1', '20'], ['0.5', '2'], ['a', 'b']], coltypes == [int, float, None]
+    (True, True)
+
+    Without rows there are no columns, only headers (as for an empty list):
+
+    >>> _typed_columns([[], []], "iO", ["Pais", "Pts"], "g") == ([], ["Pais", "Pts"], [])
+    True
+
+    """
+    if headers == "keys":
+        headers = list(map(_text_type, range(len(columns))))
+    elif headers == "firstrow" and len(columns) > 0 and len(columns[0]) > 0:
+        headers = [c[0] for c in columns]
+        columns = [c[1:] for c in columns]
+    if not any(len(c) for c in columns):
+        columns, kinds = [], []
+
+    cols = []
+    coltypes = []
+    for values, kind in zip(columns, kinds):
+        if kind in "iu":
+            cols.append(list(map(_text_type, values)))
+            coltypes.append(int)
+        elif kind == "f":
+            cols.append([format(v, floatfmt) for v in values])
+            coltypes.append(float)
+        else:
+            cols.append(values)
+            coltypes.append(None)
+
+    headers = list(map(_text_type, headers))
+    # pad with empty headers for initial columns if necessary
+    if headers and len(headers) < len(cols):
+        headers = [""]*(len(cols) - len(headers)) + headers
+
+    return cols, headers, coltypes
+
+
+def _format_columns(cols, headers, floatfmt, missingval, coltypes=None,
+                    typehints=None, numalign=None):
+    """Infer column types and convert all values to strings.
+
+    Columns with a known type (see `_normalize_columns`) are left as they are.
+    Types of columns with `typehints` (see `_type_hints`) are not inferred.
+    Return a list of formatted columns, a list of column types, a list
+    of flags, one per column or header, which are true if ANSI control
+    codes were found in the column or its header, and a list of decimals
+    of the formatted values of columns of inferred numeric types if
+    `numalign` is "decimal" (see `_number_decimals`; None for other
+    columns).
+
+    """
+    if coltypes is None:
+        coltypes = [None] * len(cols)
+    if typehints is None:
+        typehints = [None] * len(cols)
+
+    inferred = _infer_columns(cols, coltypes, typehints)
+    return _format_inferred_columns(cols, headers, inferred, floatfmt, missingval,
+                                    numalign)
+
+
+def _infer_columns(cols, coltypes=None, typehints=None):
+    """Infer types of columns, and look for ANSI control codes in them.
+
+    Return a list of results of `_infer_column`, one per column.
+
+    """
+    if coltypes is None:
+        coltypes = [None] * len(cols)
+    if typehints is None:
+        typehints = [None] * len(cols)
+    return [_infer_column(c, ct, hint) for c, ct, hint in zip(cols, coltypes, typehints)]
+
+
+def _infer_column(column, coltype=None, typehint=None):
+    """Infer the type of a column if it's not known.
+
+    Return the type of the column, a flag which is true if ANSI control
+    codes were found in the column, and how the column is formatted:
+    None if it's already formatted, "checked" if values which don't
+    match a `typehint` are formatted as text, or "inferred".
+
+    """
+    if coltype is not None:  # already formatted
+        return coltype, False, None
+    if typehint is not None:
+        return typehint, _column_invisible(column), "checked"
+    coltype, has_invisible = _column_type_and_invisible(column)
+    return coltype, has_invisible, "inferred"
+
+
+def _format_inferred_columns(cols, headers, inferred, floatfmt, missingval,
+                             numalign=None):
+    """Like `_format_columns`, for columns with known results of
+    `_infer_columns`.
+
+    """
+    # format columns, convert numeric values to strings
+    formatted = []
+    decimals = []
+    for c, inference in zip(cols, inferred):
+        coltype, has_invisible, formatting = inference
+        c = _format_inferred(c, inference, floatfmt, missingval)
+        formatted.append(c)
+        decimals.append(_number_decimals(c, coltype, has_invisible, floatfmt, missingval)
+                        if formatting == "inferred" and numalign == "decimal" else None)
+    types = [ct for ct, _, _ in inferred]
+    invisible = [inv for _, inv, _ in inferred]
+    return formatted, types, _with_header_invisible(invisible, headers), decimals
+
+
+def _format_inferred(column, inference, floatfmt, missingval):
+    "Format values of a column according to a result of `_infer_column`."
+    coltype, has_invisible, formatting = inference
+    if formatting is None:
+        return column
+    return _format_cached(column, coltype, floatfmt, missingval, has_invisible,
+                          checked=(formatting == "checked"))
+
+
+def _with_header_invisible(invisible, headers):
+    """Combine flags of ANSI control codes in columns and in their headers.
+
+    >>> _with_header_invisible([False, True, False], ["\x1b[1mA\x1b[0m", "B"])
+    [True, True, False]
+
+    """
+    header_invisible = [bool(_invisible_codes.search(_text_type(h))) for h in headers]
+    ncols = max(len(invisible), len(headers))
+    invisible = invisible + [False] * (ncols - len(invisible))
+    header_invisible = header_invisible + [False] * (ncols - len(header_invisible))
+    return [c or h for c, h in zip(invisible, header_invisible)]
+
+
+def _format_column(column, coltype, floatfmt, missingval, typehint=None):
+    """Infer the type of a column if it's not known, and format its values.
+
+    Return the formatted column, its type, and a flag which is true if
+    ANSI control codes were found in the column.
+
+    """
+    inference = _infer_column(column, coltype, typehint)
+    coltype, has_invisible, _ = inference
+    return _format_inferred(column, inference, floatfmt, missingval), coltype, has_invisible
+
+
+def _type_hints(coltypes, ncols):
+    """Column types given by the caller, for `ncols` columns.
+
+    >>> _type_hints([str, None, float], 2) == [_text_type, None]
+    True
+    >>> _type_hints([int, bool], 2)  # doctest: +ELLIPSIS
+    Traceback (most recent call last):
+      ...
+    ValueError: coltypes may contain only int, float, str, or None, not ...bool...
+
+    """
+    if not coltypes:
+        return [None] * ncols
+    aliases = {str: _text_type, _long_type: int}
+    for t in coltypes:
+        if t is not None and aliases.get(t, t) not in (int, float, _text_type):
+            raise ValueError("coltypes may contain only int, float, str, or None, not %r"
+                             % (t,))
+    hints = [aliases.get(t, t) for t in coltypes[:ncols]]
+    return hints + [None] * (ncols - len(hints))
+
+
+def _format_checked(val, valtype, floatfmt, missingval="", has_invisible=True):
+    "Like `_format`, but format values which don't match `valtype` as text."
+    try:
+        return _format(val, valtype, floatfmt, missingval, has_invisible)
+    except ValueError:
+        return _format(val, _text_type, floatfmt, missingval, has_invisible)
+
+
+# Types whose equal values are always formatted the same way. Other values
+# (e.g. Decimal("1.0") == Decimal("1.00")) are formatted without caching.
+_memo_types = frozenset([_none_type, bool, int, _long_type, _text_type, _binary_type])
+
+
+def _memo_key(v):
+    """A key of `v` in the format caches, or None if it can't be cached.
+
+    Equal floats are formatted the same, except 0.0 and -0.0:
+
+    >>> _memo_key(0.0) == _memo_key(-0.0), _memo_key(1.5) == _memo_key(1.5)
+    (False, True)
+
+    """
+    t = type(v)
+    if t is float:
+        return (v, t) if v else (repr(v), t)
+    elif t in _memo_types:
+        return (v, t)
+    else:
+        return None
+
+
+def _format_cached(column, coltype, floatfmt, missingval, has_invisible,
+                   checked=False):
+    """Format values of a column, every distinct value only once.
+
+    Formatted values are remembered in the column (to format repeated
+    values) and in the bounded _format_cache (to be reused by the next
+    tables); see `format_cache_info`. If `checked`, values which don't
+    match `coltype` are formatted as text.
+
+    >>> _format_cached([-0.0, 0.0, -0.0], float, "g", "", False)
+    ['-0', '0', '-0']
+
+    """
+    format_fn = _format_checked if checked else _format
+    cache = _format_cache
+    options = (coltype, floatfmt, missingval, bool(has_invisible))
+    memo = {}
+    formatted = []
+    hits = 0
+    for i, v in enumerate(column):
+        key = _memo_key(v)
+        if key is None:
+            formatted.append(format_fn(v, coltype, floatfmt, missingval, has_invisible))
+            continue
+        s = memo.get(key)
+        if s is None:
+            if len(memo) >= cache.maxsize and hits < len(memo):
+                # mostly distinct values, caching doesn't pay off
+                formatted.extend(format_fn(w, coltype, floatfmt, missingval, has_invisible)
+                                 for w in islice(column, i, None))
+                break
+            s = cache.get(key + options)
+            if s is None:
+                s = format_fn(v, coltype, floatfmt, missingval, has_invisible)
+                cache.put(key + options, s)
+            memo[key] = s
+        else:
+            hits += 1
+        formatted.append(s)
+    cache.hits += hits
+    return formatted
+
+
+def _align_columns(cols, headers, coltypes, numalign, stralign, invisible,
+                   colwidths=None, decimals=None):
+    """Pad formatted columns and headers to the common column widths.
+
+    `invisible` are flags of ANSI control codes in columns (see
+    `_format_columns`); columns without control codes are measured
+    with `len`. Columns with known `colwidths` (not None) are not
+    measured at all. Known `decimals` of columns (see `_format_columns`)
+    are used for decimal alignment. Return aligned headers, aligned
+    columns, column widths, and column alignments.
+
+    """
+    cols, minwidths, aligns = _align_data_columns(cols, headers, coltypes,
+                                                  numalign, stralign, invisible,
+                                                  colwidths, decimals)
+    headers, minwidths = _align_headers(headers, cols, aligns, minwidths,
+                                        stralign, invisible, colwidths)
+    return headers, cols, minwidths, aligns
+
+
+def _align_data_columns(cols, headers, coltypes, numalign, stralign, invisible,
+                        colwidths=None, decimals=None):
+    """Pad formatted columns, but not headers (see `_align_columns`).
+
+    Return aligned columns, minimal widths of columns (those of their
+    headers), and column alignments.
+
+    """
+    if colwidths is None:
+        colwidths = [None] * len(cols)
+    if decimals is None:
+        decimals = [None] * len(cols)
 
     # align columns
     aligns = [numalign if ct in [int,float] else stralign for ct in coltypes]
-    minwidths = [width_fn(h) + MIN_PADDING for h in headers] if headers else [0]*len(cols)
-    cols = [_align_column(c, a, minw, has_invisible)
-            for c, a, minw in zip(cols, aligns, minwidths)]
+    minwidths = ([_width_fn(inv)(h) + MIN_PADDING for h, inv in zip(headers, invisible)]
+                 if headers else [0]*len(cols))
+    cols = [_align_column(c, a, minw, inv, w, d)
+            for c, a, minw, inv, w, d
+            in zip(cols, aligns, minwidths, invisible, colwidths, decimals)]
+    return cols, minwidths, aligns
+
+
+def _width_fn(has_invisible):
+    "A function which returns the visible width of a string."
+    return _visible_width if has_invisible else len
+
 
+def _align_headers(headers, cols, aligns, minwidths, stralign, invisible,
+                   colwidths=None):
+    """Align headers to aligned columns; return headers and column widths.
+
+    Widths of columns are those of their first cells, or max(`colwidths`,
+    `minwidths`) for columns of known widths.
+
+    """
+    if colwidths is None:
+        colwidths = [None] * len(cols)
     if headers:
         # align headers and add headers
         t_cols = cols or [['']] * len(headers)
         t_aligns = aligns or [stralign] * len(headers)
-        minwidths = [max(minw, width_fn(c[0])) for minw, c in zip(minwidths, t_cols)]
+        t_widths = colwidths + [None] * (len(t_cols) - len(colwidths))
+        minwidths = [max(minw, _width_fn(inv)(c[0]) if w is None else w)
+                     for minw, c, inv, w in zip(minwidths, t_cols, invisible, t_widths)]
         headers = [_align_header(h, a, minw)
                    for h, a, minw in zip(headers, t_aligns, minwidths)]
-        rows = list(zip(*cols))
     else:
-        minwidths = [width_fn(c[0]) for c in cols]
-        rows = list(zip(*cols))
+        minwidths = [_width_fn(inv)(c[0]) if w is None else w
+                     for c, inv, w in zip(cols, invisible, colwidths)]
+    return headers, minwidths
 
-    if not isinstance(tablefmt, TableFormat):
-        tablefmt = _table_formats.get(tablefmt, _table_formats["simple"])
 
-    return _format_table(tablefmt, headers, rows, minwidths, aligns)
+def _parallel_columns(executor, cols, headers, coltypes, floatfmt, missingval,
+                      numalign, stralign, typehints, colwidths):
+    """Like `_format_columns` followed by `_align_columns`, but every column
+    is formatted and aligned as a separate task of `executor`.
+
+    """
+    header_invisible = _with_header_invisible([], headers)
+    minwidths = ([_width_fn(inv)(h) + MIN_PADDING for h, inv in zip(headers, header_invisible)]
+                 if headers else [0]*len(cols))
+    header_invisible += [False] * (len(cols) - len(header_invisible))
+    tasks = [(c, ct, minw, hinv, floatfmt, missingval, numalign, stralign, hint, w)
+             for c, ct, minw, hinv, hint, w
+             in zip(cols, coltypes, minwidths, header_invisible, typehints, colwidths)]
+    results = list(executor.map(_process_column, tasks))
+    cols = [c for c, _, _, _ in results]
+    aligns = [a for _, _, a, _ in results]
+    invisible = _with_header_invisible([inv for _, _, _, inv in results], headers)
+    headers, minwidths = _align_headers(headers, cols, aligns, minwidths,
+                                        stralign, invisible, colwidths)
+    return headers, cols, minwidths, aligns
+
+
+def _process_column(task):
+    """Format and align one column (a task of `_parallel_columns`).
+
+    Return the aligned column, its type, its alignment, and a flag of
+    ANSI control codes in the column or its header.
+
+    """
+    (column, coltype, minwidth, header_invisible,
+     floatfmt, missingval, numalign, stralign, typehint, width) = task
+    inferred = coltype is None and typehint is None
+    column, coltype, has_invisible = _format_column(column, coltype, floatfmt,
+                                                    missingval, typehint)
+    alignment = numalign if coltype in [int, float] else stralign
+    decimals = (_number_decimals(column, coltype, has_invisible, floatfmt, missingval)
+                if inferred and alignment == "decimal" else None)
+    has_invisible = has_invisible or header_invisible
+    column = _align_column(column, alignment, minwidth, has_invisible, width,
+                           decimals)
+    return column, coltype, alignment, has_invisible
+
+
+def _stream_row(row, ncols, coltypes, aligns, colwidths, maxdecimals,
+                floatfmt, missingval, overflow="widen", overflows=None):
+    """Format and align a row which was not seen when the layout was computed.
+
+    Cells wider than their columns are truncated if `overflow` is
+    "truncate"; their number is added to `overflows[0]`.
+
+    """
+    values = list(row)[:ncols]
+    if len(values) < ncols:
+        values.extend([None] * (ncols - len(values)))
+    cells = [_stream_cell(v, ct, a, w, md, floatfmt, missingval)
+             for v, ct, a, w, md in zip(values, coltypes, aligns, colwidths, maxdecimals)]
+    for i, (cell, width) in enumerate(zip(cells, colwidths)):
+        if len(cell) > width and _visible_width(cell) > width:
+            if overflows is not None:
+                overflows[0] += 1
+            if overflow == "truncate":
+                cells[i] = _truncate(cell, width)
+    return cells
+
+
+def _truncate(s, width):
+    """Cut a string to `width` visible characters, ending with an ellipsis.
+
+    >>> _truncate("Argentina", 5) == "Arge\u2026"
+    True
+
+    """
+    s = _strip_invisible(s)
+    if width < 1:
+        return ""
+    return s[:width - 1] + "\u2026"
+
+
+def _stream_cell(val, valtype, alignment, width, maxdecimals, floatfmt, missingval):
+    """Format and pad a single value using a precomputed column layout.
+
+    >>> _stream_cell(3.5, int, "decimal", 5, -1, "g", "")
+    '  3.5'
+    >>> _stream_cell("n/a", float, "decimal", 7, 2, "g", "")
+    ' n/a   '
+
+    """
+    colored = isinstance(val, _text_type) and "\x1b" in val
+    try:
+        s = _format(val, valtype, floatfmt, missingval, colored)
+    except ValueError:
+        # the value doesn't match the type inferred from the first rows
+        s = _format(val, _text_type, floatfmt, missingval)
+    return _pad_cell(s, alignment, width, maxdecimals)
+
+
+def _pad_cell(s, alignment, width, maxdecimals):
+    """Pad a formatted value using a precomputed column layout.
+
+    >>> _pad_cell("3.5", "decimal", 7, 2)
+    '   3.5 '
+
+    """
+    has_invisible = "\x1b" in s
+    if alignment == "decimal":
+        decs = _afterpoint(_strip_invisible(s) if has_invisible else s)
+        return _padleft(width, s + max(0, maxdecimals - decs) * " ", has_invisible)
+    elif not alignment:
+        return s
+    elif alignment == "right":
+        return _padleft(width, s.strip(), has_invisible)
+    elif alignment == "center":
+        return _padboth(width, s.strip(), has_invisible)
+    else:
+        return _padright(width, s.strip(), has_invisible)
 
 
 def _build_simple_row(padded_cells, rowfmt):
@@ -938,16 +2585,6 @@ def _build_simple_row(padded_cells, rowfmt):
     return (begin + sep.join(padded_cells) + end).rstrip()
 
 
-def _build_row(padded_cells, colwidths, colaligns, rowfmt):
-    "Return a string which represents a row of data cells."
-    if not rowfmt:
-        return None
-    if hasattr(rowfmt, "__call__"):
-        return rowfmt(padded_cells, colwidths, colaligns)
-    else:
-        return _build_simple_row(padded_cells, rowfmt)
-
-
 def _build_line(colwidths, colaligns, linefmt):
     "Return a string which represents a horizontal line."
     if not linefmt:
@@ -971,38 +2608,189 @@ def _pad_row(cells, padding):
 
 def _format_table(fmt, headers, rows, colwidths, colaligns):
     """Produce a plain-text representation of the table."""
-    lines = []
-    hidden = fmt.with_header_hide if (headers and fmt.with_header_hide) else []
-    pad = fmt.padding
-    headerrow = fmt.headerrow
+    return "\n".join(_iter_table_lines(fmt, headers, rows, colwidths, colaligns))
+
+
+def _iter_table_lines(fmt, headers, rows, colwidths, colaligns):
+    """Generate lines of a plain-text representation of the table.
+
+    `rows` may be any iterable of aligned rows; it is consumed lazily.
+
+    """
+    template = table_template(fmt, colwidths, colaligns)
+    datarow = template.datarow
+    return _iter_template_lines(template, headers, (datarow(row) for row in rows))
+
+
+def _iter_template_lines(template, headers, datalines):
+    """Generate lines of a table from a TableTemplate and rendered data rows
+    (see `table_template`).
+
+    """
+    hidden = template.with_header_hide if (headers and template.with_header_hide) else []
+
+    if template.lineabove is not None and "lineabove" not in hidden:
+        yield template.lineabove
+
+    if headers:
+        yield template.headerrow(headers)
+        if template.linebelowheader is not None and "linebelowheader" not in hidden:
+            yield template.linebelowheader
+
+    between = template.linebetweenrows
+    if between is not None and "linebetweenrows" not in hidden:
+        # a line between rows, but not below the last row
+        for i, line in enumerate(datalines):
+            if i:
+                yield between
+            yield line
+    else:
+        for line in datalines:
+            yield line
+
+    if template.linebelow is not None and "linebelow" not in hidden:
+        yield template.linebelow
+
+
+# A TableFormat compiled for a fixed column layout:
+#
+#   - line* elements are rendered strings, or None if not used,
+#   - *row elements are functions: [aligned_cell_values] -> string.
+#
+TableTemplate = namedtuple("TableTemplate", ["lineabove", "linebelowheader",
+                                             "linebetweenrows", "linebelow",
+                                             "headerrow", "datarow",
+                                             "with_header_hide"])
+
+
+_table_templates = {}
+_TABLE_TEMPLATES_MAXSIZE = 256
+
+
+def table_template(tablefmt, colwidths, colaligns):
+    """Compile a table format for the given column widths and alignments.
+
+    Horizontal lines are rendered once, and data rows are rendered with
+    a single `str.format` call. Templates are cached, and can be reused
+    for all tables with the same layout.
+
+    >>> t = table_template("grid", [4, 3], ["left", "right"])
+    >>> print(t.datarow(["spam", " 42"]))
+    | spam |  42 |
+    >>> print(t.linebelow)
+    +------+-----+
 
+    """
+    if not isinstance(tablefmt, TableFormat):
+        tablefmt = _table_formats.get(tablefmt, _table_formats["simple"])
+    key = (tablefmt[:-1], tuple(tablefmt.with_header_hide or ()),
+           tuple(colwidths), tuple(colaligns))
+    try:
+        return _table_templates[key]
+    except KeyError:
+        pass
+    except TypeError:  # unhashable custom format
+        return _compile_template(tablefmt, colwidths, colaligns)
+    if len(_table_templates) >= _TABLE_TEMPLATES_MAXSIZE:
+        _table_templates.clear()
+    template = _table_templates[key] = _compile_template(tablefmt, colwidths, colaligns)
+    return template
+
+
+def _compile_template(fmt, colwidths, colaligns):
+    "Produce a TableTemplate (see `table_template`)."
+    pad = fmt.padding
     padded_widths = [(w + 2*pad) for w in colwidths]
-    padded_headers = _pad_row(headers, pad)
-    padded_rows = [_pad_row(row, pad) for row in rows]
-
-    if fmt.lineabove and "lineabove" not in hidden:
-        lines.append(_build_line(padded_widths, colaligns, fmt.lineabove))
-
-    if padded_headers:
-        lines.append(_build_row(padded_headers, padded_widths, colaligns, headerrow))
-        if fmt.linebelowheader and "linebelowheader" not in hidden:
-            lines.append(_build_line(padded_widths, colaligns, fmt.linebelowheader))
-
-    if padded_rows and fmt.linebetweenrows and "linebetweenrows" not in hidden:
-        # initial rows with a line below
-        for row in padded_rows[:-1]:
-            lines.append(_build_row(row, padded_widths, colaligns, fmt.datarow))
-            lines.append(_build_line(padded_widths, colaligns, fmt.linebetweenrows))
-        # the last row without a line below
-        lines.append(_build_row(padded_rows[-1], padded_widths, colaligns, fmt.datarow))
+    colaligns = list(colaligns)
+
+    def line(linefmt):
+        if not linefmt:
+            return None
+        return _build_line(padded_widths, colaligns, linefmt)
+
+    return TableTemplate(lineabove=line(fmt.lineabove),
+                         linebelowheader=line(fmt.linebelowheader),
+                         linebetweenrows=line(fmt.linebetweenrows),
+                         linebelow=line(fmt.linebelow),
+                         headerrow=_compile_row(fmt.headerrow, pad, padded_widths,
+                                                colaligns, len(colwidths)),
+                         datarow=_compile_row(fmt.datarow, pad, padded_widths,
+                                              colaligns, len(colwidths)),
+                         with_header_hide=fmt.with_header_hide)
+
+
+def _compile_row(rowfmt, padding, padded_widths, colaligns, ncols):
+    "Return a function which renders a row of aligned cells."
+    if not rowfmt:
+        return lambda cells: None
+    if hasattr(rowfmt, "__call__"):
+        render = _compile_markup_row(rowfmt, padding, padded_widths, colaligns)
+        if render is None:
+            def render(cells):
+                return rowfmt(_pad_row(cells, padding), padded_widths, colaligns)
+        return render
+
+    begin, sep, end = rowfmt
+    pad = " "*padding
+    if ncols:
+        fields = (pad + _format_literal(sep) + pad).join(["{}"] * ncols)
+        template = _format_literal(begin) + pad + fields + pad + _format_literal(end)
+    else:
+        template = _format_literal(begin) + _format_literal(end)
+    template_format = template.format
+
+    def render(cells):
+        try:
+            return template_format(*cells).rstrip()
+        except IndexError:  # a row of a different length
+            return _build_simple_row(_pad_row(cells, padding), rowfmt)
+    return render
+
+
+def _format_literal(s):
+    "Escape braces of a literal part of a `str.format` template."
+    return s.replace("{", "{{").replace("}", "}}")
+
+
+def _compile_markup_row(rowfmt, padding, padded_widths, colaligns):
+    """Return a function which renders a row of a built-in markup format
+    (mediawiki, html, latex), or None for other row functions.
+
+    Markup around cells is prepared once, the row is rendered with a
+    single `str.format` call, and cells are escaped with `str.translate`.
+
+    """
+    func, args = rowfmt, ()
+    if isinstance(rowfmt, partial) and not rowfmt.keywords:
+        func, args = rowfmt.func, rowfmt.args
+    pad = " "*padding
+    if func is _mediawiki_row_with_attrs and len(args) == 1:
+        separator = args[0]
+        cellfmts = [" " + _mediawiki_alignment.get(a, "") + pad + "{}" + pad + " "
+                    for a in colaligns]
+        begin, sep, end, table = separator, separator*2, "", None
+    elif func is _html_row_with_attrs and len(args) == 1:
+        celltag = args[0]
+        cellfmts = ["<" + celltag + _html_alignment.get(a, "") + ">" + pad + "{}" + pad +
+                    "</" + celltag + ">"
+                    for a in colaligns]
+        begin, sep, end, table = "<tr>", "", "</tr>", _html_escape_table
+    elif func is _latex_row and not args:
+        cellfmts = [pad + "{}" + pad] * len(padded_widths)
+        begin, sep, end, table = "", "&", "\\\\", _latex_escape_table
     else:
-        for row in padded_rows:
-            lines.append(_build_row(row, padded_widths, colaligns, fmt.datarow))
+        return None
 
-    if fmt.linebelow and "linebelow" not in hidden:
-        lines.append(_build_line(padded_widths, colaligns, fmt.linebelow))
+    ncells = len(cellfmts)
+    template_format = (_format_literal(begin) + _format_literal(sep).join(cellfmts) + _format_literal(end)).format
 
-    return "\n".join(lines)
+    def render(cells):
+        if len(cells) != ncells:
+            return rowfmt(_pad_row(cells, padding), padded_widths, colaligns)
+        if table is not None:
+            cells = [c.translate(table) for c in cells]
+        return template_format(*cells).rstrip()
+    return render
 
 
 def _main():
@@ -1021,6 +2809,10 @@ def _main():
     -1, --header              use the first row of data as a table header
     -o FILE, --output FILE    print table to FILE (default: stdout)
     -s REGEXP, --sep REGEXP   use a custom column separator (default: whitespace)
+    -l N, --lookahead N       compute column widths from the first N rows only,
+                              and stream the rest (default: read all rows)
+    -u, --unaligned           write tab-separated rows without aligning columns;
+                              --format is ignored
     -F FPFMT, --float FPFMT   floating point number format (default: g)
     -f FMT, --format FMT      set output table format; supported formats:
                               plain, simple, grid, fancy_grid, pipe, orgtbl,
@@ -1033,8 +2825,9 @@ def _main():
     usage = textwrap.dedent(_main.__doc__)
     try:
         opts, args = getopt.getopt(sys.argv[1:],
-                     "h1o:s:F:f:",
-                     ["help", "header", "output", "sep=", "float=", "format="])
+                     "h1o:s:l:uF:f:",
+                     ["help", "header", "output", "sep=", "lookahead=",
+                      "unaligned", "float=", "format="])
     except getopt.GetoptError as e:
         print(e)
         print(usage)
@@ -1044,6 +2837,8 @@ def _main():
     tablefmt = "simple"
     sep = r"\s+"
     outfile = "-"
+    lookahead = None
+    unaligned = False
     for opt, value in opts:
         if opt in ["-1", "--header"]:
             headers = "firstrow"
@@ -1059,6 +2854,15 @@ def _main():
             tablefmt = value
         elif opt in ["-s", "--sep"]:
             sep = value
+        elif opt in ["-l", "--lookahead"]:
+            try:
+                lookahead = int(value) or None
+            except ValueError:
+                print("%s is not a number of rows" % value)
+                print(usage)
+                sys.exit(2)
+        elif opt in ["-u", "--unaligned"]:
+            unaligned = True
         elif opt in ["-h", "--help"]:
             print(usage)
             sys.exit(0)
@@ -1069,17 +2873,86 @@ def _main():
                 f = sys.stdin
             if _is_file(f):
                 _pprint_file(f, headers=headers, tablefmt=tablefmt,
-                             sep=sep, floatfmt=floatfmt, file=out)
+                             sep=sep, floatfmt=floatfmt, file=out,
+                             lookahead=lookahead, unaligned=unaligned)
             else:
                 with open(f) as fobj:
                     _pprint_file(fobj, headers=headers, tablefmt=tablefmt,
-                                 sep=sep, floatfmt=floatfmt, file=out)
+                                 sep=sep, floatfmt=floatfmt, file=out,
+                                 lookahead=lookahead, unaligned=unaligned)
+
+
+def _pprint_file(fobject, headers, tablefmt, sep, floatfmt, file, lookahead=None,
+                 unaligned=False):
+    split = _line_splitter(sep)
+    table = (split(line.rstrip()) for line in _iter_file_lines(fobject))
+    if unaligned:
+        write_delimited(file, table, headers, floatfmt=floatfmt)
+    else:
+        tabulate_to(file, table, headers, tablefmt, floatfmt=floatfmt,
+                    lookahead=lookahead)
+
+
+def _line_splitter(sep):
+    """Return a function which splits a line into fields like `re.split(sep, line)`.
 
+    >>> split = _line_splitter(r"\\s+")
+    >>> split("  spam  42"), split("")
+    (['', 'spam', '42'], [''])
+    >>> _line_splitter(",")("spam,,42")
+    ['spam', '', '42']
 
-def _pprint_file(fobject, headers, tablefmt, sep, floatfmt, file):
-    rows = fobject.readlines()
-    table = [re.split(sep, r.rstrip()) for r in rows]
-    print(tabulate(table, headers, tablefmt, floatfmt=floatfmt), file=file)
+    """
+    if sep == r"\s+":
+        # str.split() splits on the same whitespace, but drops the leading field
+        def split_whitespace(line):
+            fields = line.split()
+            if line[:1].isspace():
+                fields.insert(0, "")
+            return fields or [""]
+        return split_whitespace
+    if sep == r"\t":
+        sep = "\t"
+    if len(sep) == 1 and sep not in ".^$*+?{}[]\\|()":
+        literal = sep
+        return lambda line: line.split(literal)
+    return re.compile(sep).split
+
+
+def _iter_file_lines(fobject, chunksize=65536):
+    """Read lines of a file incrementally, without line terminators.
+
+    Regular files are memory-mapped; other files (like pipes and stdin)
+    are read in chunks of `chunksize` characters.
+
+    """
+    import mmap
+    import os
+    import stat
+    try:
+        fd = fobject.fileno()
+        is_regular = stat.S_ISREG(os.fstat(fd).st_mode) and os.fstat(fd).st_size > 0
+    except (AttributeError, IOError, OSError, ValueError):
+        is_regular = False
+
+    if is_regular:
+        import locale
+        encoding = getattr(fobject, "encoding", None) or locale.getpreferredencoding(False)
+        mapped = mmap.mmap(fd, 0, access=mmap.ACCESS_READ)
+        try:
+            for line in iter(mapped.readline, b""):
+                yield line.decode(encoding).rstrip("\r\n")
+        finally:
+            mapped.close()
+    else:
+        tail = fobject.read(0)  # an empty str or bytes object
+        for chunk in iter(partial(fobject.read, chunksize), tail[:0]):
+            lines = (tail + chunk).split("\n" if isinstance(chunk, _text_type) else b"\n")
+            tail = lines.pop()
+            for line in lines:
+                yield line
+        if tail:
+            yield tail
 
 if __name__ == "__main__":
     _main()